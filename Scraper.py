@@ -1,17 +1,137 @@
-import csv
+import argparse
 import os
+import queue
+import shutil
+import subprocess
+import threading
 import time
-import pandas as pd
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from lxml import etree, html as lxml_html
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException, NoSuchElementException, WebDriverException
+from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException, NoSuchElementException, SessionNotCreatedException, WebDriverException
 from functools import wraps
-from datetime import datetime
-from webdriver_manager.chrome import ChromeDriverManager
+from datetime import datetime, timedelta
+from address import AddressMemo, address_match_score, parse_address
+from page_cache import PageCache, is_closed_case
+from case_state import CHANGED, NEW, UNCHANGED, CaseStateStore, content_hash
+from journal import AUDITOR, PROBATE, RunJournal
+from parcel_index import ParcelIndex
+from metrics import METRICS
+from output import changes_path, open_writer, records_for_case
+from rate_limit import SCHEDULER, backoff_delay
+
+# Engine used for the probate detail pages: "http" fetches them with a pooled
+# requests session and parses with lxml, "selenium" drives Chrome for every page.
+# The HTTP engine falls back to Chrome for any case it fails to fetch.
+PROBATE_ENGINE = "http"
+
+# Number of case workers. Each worker owns its own HTTP session and/or Chrome
+# driver, so memory grows with this value (roughly 300 MB per Chrome).
+CASE_WORKERS = 4
+
+# Fiduciary and attorney pages of one case fetched in parallel (HTTP engine)
+DETAIL_FETCH_WORKERS = 4
+
+# On-disk cache of fetched pages and parsed records (--cache). FORCE_REFRESH
+# (or --refresh) ignores cached entries for a run; fresh results are still
+# written back.
+CACHE_PATH = "scraper_cache.sqlite"
+FORCE_REFRESH = False
+
+# Local index built from the auditor's bulk parcel file by parcel_index.py.
+# Addresses found there skip the live auditor search entirely.
+PARCEL_INDEX_PATH = "parcels.sqlite"
+
+# Case numbers, detail-page hashes and last records of earlier delta runs
+DELTA_STATE_PATH = "case_state.sqlite"
+
+# Performance-tuned Chrome: no images/CSS/fonts, eager page loads, small fixed
+# window and no extensions, GPU or background networking.
+LEAN_BROWSER = True
+
+# Resolved chromedriver path, recorded after the first webdriver-manager
+# install so later launches skip its network version lookup. CHROMEDRIVER_PATH
+# overrides it; CHROMEDRIVER_VERSION pins the version webdriver-manager fetches.
+CHROMEDRIVER_PATH_FILE = ".chromedriver_path"
+
+# SessionNotCreatedException messages that mean the recorded chromedriver no
+# longer matches the installed Chrome, as opposed to e.g. an unreachable
+# --attach address, which a different chromedriver would not fix.
+DRIVER_VERSION_MISMATCH = ("only supports chrome version", "current browser version")
+
+# Session ids of drivers attached to an already-running browser. Those
+# browsers are left running when the driver is released.
+attached_sessions = set()
+
+# Sub-resources the scraper never reads; blocked through CDP in lean mode
+BLOCKED_RESOURCE_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    "*.css", "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+]
+
+INDEX_URL = 'https://probatesearch.franklincountyohio.gov/netdata/PBODateInx.ndm/input?string={date}'
+CASE_URL = 'http://probatesearch.franklincountyohio.gov/netdata/PBCaseTypeE.ndm/ESTATE_DETAIL?caseno={case};;'
+ADMIN_URL = 'https://probatesearch.franklincountyohio.gov/netdata/PBFidy.ndm/input?caseno={case};;'
+FIDUCIARY_URL = 'https://probatesearch.franklincountyohio.gov/netdata/PBFidDetail.ndm/FID_DETAIL?caseno={case};;{index}'
+ATTORNEY_URL = 'https://probatesearch.franklincountyohio.gov/netdata/PBAttyDetail.ndm/ATTY_DETAIL?caseno={case};;{index}'
+
+CASE_ROWS_XPATH = "//table[@bgcolor='black']//tr[td/font[normalize-space(text()) = 'FULL ADMINISTRATION WITH WILL' or normalize-space(text()) = 'FULL ADMINISTRATION WITHOUT WILL']]/td[1]/a"
+ADMIN_ROWS_XPATH = '//table[@bgcolor="black"]/tbody/tr[@bgcolor != "#07528B"]'
+# The raw server HTML has no <tbody>; Chrome inserts it when building the DOM.
+HTTP_ADMIN_ROWS_XPATH = '//table[@bgcolor="black"]//tr[@bgcolor != "#07528B"]'
+
+# Define XPaths for case details
+CASE_FIELDS = [
+    {"xpath": "//tr[th/font[normalize-space(text()) = 'Case Name']]/td/font", "key": "case_name", "description": "Case Name"},
+    {"xpath": "//tr[th/font[normalize-space(text()) = 'Case Subtype']]/td/font", "key": "case_subtype", "description": "Case Subtype"},
+    {"xpath": "//tr[th/font[normalize-space(text()) = 'Decedent Street']]/td/font", "key": "decendent_address", "description": "Decedent Address"},
+    {"xpath": "//tr[th/font[normalize-space(text()) = 'City']]/td/font", "key": "decendent_city", "description": "Decedent City"},
+    {"xpath": "//tr[th/font[normalize-space(text()) = 'State']]/td/font", "key": "decendent_state", "description": "Decedent State"},
+    {"xpath": "//tr[th/font[normalize-space(text()) = 'Zip']]/td/font", "key": "decendent_zip", "description": "Decedent Zip Code"},
+    # Only used to give closed estates a long cache TTL
+    {"xpath": "//tr[th/font[normalize-space(text()) = 'Case Status']]/td/font", "key": "case_status"},
+]
+
+ADMIN_FIELDS = [
+    {"xpath": "//tr[th/font[normalize-space(text()) = 'Estate Fiduciaries Name']]/td/font", "key": "admin_name", "description": "Admin Name"},
+    {"xpath": "//tr[th/font[normalize-space(text()) = 'Street']]/td/font", "key": "admin_address", "description": "Admin Address"},
+    {"xpath": "//tr[th/font[normalize-space(text()) = 'City']]/td/font", "key": "admin_city", "description": "Admin City"},
+    {"xpath": "//tr[th/font[normalize-space(text()) = 'State']]/td/font", "key": "admin_state", "description": "Admin State"},
+    {"xpath": "//tr[th/font[normalize-space(text()) = 'Zip']]/td/font", "key": "admin_zip", "description": "Admin Zip Code"},
+    {"xpath": "//tr[th/font[normalize-space(text()) = 'Phone Number']]/td/font", "key": "admin_phone", "description": "Admin Phone Number"},
+]
+
+ATTORNEY_FIELDS = [
+    {"xpath": "//tr[th/font[normalize-space(text()) = 'Attorney Name']]/td/font", "key": "attorney_name", "description": "Attorney Name"},
+    {"xpath": "//tr[th/font[normalize-space(text()) = 'Phone Number']]/td/font", "key": "attorney_phone", "description": "Attorney Phone Number"},
+    {"xpath": "//tr[th/font[normalize-space(text()) = 'E-mail Address']]/td/font", "key": "attorney_email", "description": "Attorney Email"},
+]
+
+# Auditor datalet fields; parcel_id is post-processed to drop its "Parcel ID:" label
+AUDITOR_FIELDS = [
+    {"xpath": '//td[@class="DataletHeaderTopLeft"]', "key": "parcel_id", "description": "Parcel ID"},
+    {"xpath": '(//table[@id="Dwelling Data"]//td)[10]', "key": "bedrooms", "description": "bedrooms"},
+    {"xpath": '(//table[@id="Dwelling Data"]//td)[11]', "key": "bathrooms", "description": "bathrooms"},
+    {"xpath": '(//table[@id="Dwelling Data"]//td)[8]', "key": "Tot Fin Area", "description": "Tot Fin Area"},
+    {"xpath": '(//table[@id="Dwelling Data"]//td)[7]', "key": "Year built", "description": "Year built"},
+    {"xpath": '//tr[td[contains(text(), "Transfer Date")]]/td[@class="DataletData"]', "key": "Transfer Date", "description": "Transfer Date"},
+    {"xpath": '//tr[td[contains(text(), "Transfer Price")]]/td[@class="DataletData"]', "key": "Transfer Price", "description": "Transfer Price"},
+]
+
+# Compile every field XPath once at import so extraction only evaluates them
+for field in CASE_FIELDS + ADMIN_FIELDS + ATTORNEY_FIELDS + AUDITOR_FIELDS:
+    field["compiled"] = etree.XPath(field["xpath"])
 
 
 def retries(max_retries=3, delay=2, exceptions=(Exception,)):
@@ -24,106 +144,254 @@ def retries(max_retries=3, delay=2, exceptions=(Exception,)):
                     return func(*args, **kwargs)
                 except exceptions as e:
                     attempts += 1
+                    METRICS.incr("retries", func.__name__)
                     print(f"Function '{func.__name__}' crashed on attempt {attempts}/{max_retries}: {e}")
                     if attempts < max_retries:
-                        print(f"Retrying function '{func.__name__}'...")
-                        time.sleep(delay)
+                        wait = backoff_delay(attempts, delay)
+                        print(f"Retrying function '{func.__name__}' in {wait:.1f}s...")
+                        time.sleep(wait)
                     else:
                         print(f"Function '{func.__name__}' failed after {max_retries} retries.")
                         raise
         return wrapper
     return decorator
 
-@retries(max_retries=5, delay=1, exceptions=(ElementClickInterceptedException, TimeoutException))
-def extract_and_convert_ordinal(text):
-        number_to_words = {
-            "1": "First", "2": "Second", "3": "Third", "4": "Fourth", "5": "Fifth", 
-            "6": "Sixth", "7": "Seventh", "8": "Eighth", "9": "Ninth", "10": "Tenth",
-            "11": "Eleventh", "12": "Twelfth", "13": "Thirteenth", "14": "Fourteenth", 
-            "15": "Fifteenth", "16": "Sixteenth", "17": "Seventeenth", "18": "Eighteenth", 
-            "19": "Nineteenth", "20": "Twentieth", "21": "Twenty First", "22": "Twenty Second",
-            "23": "Twenty Third", "24": "Twenty Fourth", "25": "Twenty Fifth", "26": "Twenty Sixth",
-            "27": "Twenty Seventh", "28": "Twenty Eighth", "29": "Twenty Ninth", "30": "Thirtieth"
-        }
-
-        words = text.split()
-        for word in words:
-            if word.isdigit() or (word[:-2].isdigit() and word[-2:] in ["ST", "ND", "RD", "TH"]):
-                key = word[:-2] if word[:-2].isdigit() else word
-                return number_to_words.get(key, word)
-        return text
-
-def parse_address(address):
-    # Split the address
-    address_parts = address.split(",")
-    
-    street = address_parts[0].strip().split(" ")
-    state_info = address_parts[-1].strip().split(" ") if len(address_parts) > 1 else ""
-
-    # Split the street values
-    if len(street) < 2:
-         return {
-        'street_no': '',
-        'street_name': '',
-        'city': '',
-        'state': '',
-        'zip': '',
-    }
-    street_no = street[0] if len(street) > 0 else ''
-    print('street ' , street)
-    street_name = None
-    if len(street[1]) > 1:
-        street_name = extract_and_convert_ordinal(street[1])
-    elif len(street) > 2 :
-        street_name = extract_and_convert_ordinal(street[2])
-
-    # Split the state information
-    city = state_info[0] if len(state_info) > 0 else ''
-    state = state_info[1] if len(state_info) > 1 else ''
-    zip_code = state_info[2] if len(state_info) > 2 else ''  # Assuming zip is at index 2
-
-    return {
-        'street_no': street_no,
-        'street_name': street_name,
-        'city': city,
-        'state': state,
-        'zip': zip_code,
-    }
+def resolve_chromedriver():
+    path = os.environ.get("CHROMEDRIVER_PATH")
+    if path and os.path.exists(path):
+        return path
+    # The recorded path is reused only for the same CHROMEDRIVER_VERSION pin
+    version = os.environ.get("CHROMEDRIVER_VERSION")
+    if os.path.exists(CHROMEDRIVER_PATH_FILE):
+        with open(CHROMEDRIVER_PATH_FILE, encoding="utf-8") as path_file:
+            lines = path_file.read().splitlines()
+        path = lines[0].strip() if lines else ""
+        recorded_version = lines[1].strip() if len(lines) > 1 else ""
+        if path and os.path.exists(path) and recorded_version == (version or ""):
+            return path
 
+    # Only imported on a cold cache: it resolves versions over the network
+    from webdriver_manager.chrome import ChromeDriverManager
+    print("Resolving chromedriver with webdriver-manager...")
+    path = ChromeDriverManager(driver_version=version).install()
+    with open(CHROMEDRIVER_PATH_FILE, "w", encoding="utf-8") as path_file:
+        path_file.write(f"{path}\n{version or ''}\n")
+    return path
 
-@retries(max_retries=5, delay=1, exceptions=(ElementClickInterceptedException, TimeoutException))
-def get_chromedriver(headless=False):
+
+def start_chrome(chrome_options):
+    # A recorded chromedriver goes stale when Chrome auto-updates; forget it
+    # and resolve a matching one once before giving up.
+    try:
+        return webdriver.Chrome(service=Service(resolve_chromedriver()), options=chrome_options)
+    except SessionNotCreatedException as e:
+        message = (e.msg or "").lower()
+        if not os.path.exists(CHROMEDRIVER_PATH_FILE) or not any(text in message for text in DRIVER_VERSION_MISMATCH):
+            raise
+        print(f"Recorded chromedriver was rejected, resolving it again: {e.msg}")
+        os.remove(CHROMEDRIVER_PATH_FILE)
+        return webdriver.Chrome(service=Service(resolve_chromedriver()), options=chrome_options)
+
+
+def find_chrome_binary():
+    for name in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"):
+        path = shutil.which(name)
+        if path:
+            return path
+    for path in (
+        r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+        r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+        "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+    ):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def launch_warm_browser(port=9222, headless=True, profile_dir="chrome-profile"):
+    # Starts a detached Chrome with remote debugging so later runs can attach
+    # with --attach instead of paying for a cold browser start.
+    binary = os.environ.get("CHROME_BINARY") or find_chrome_binary()
+    if binary is None:
+        raise FileNotFoundError("Chrome binary not found, set CHROME_BINARY")
+    arguments = [
+        binary,
+        f"--remote-debugging-port={port}",
+        f"--user-data-dir={os.path.abspath(profile_dir)}",
+        "--no-first-run",
+        "--disable-extensions",
+        "--window-size=1280,900",
+    ]
+    if headless:
+        arguments.append("--headless")
+    process = subprocess.Popen(arguments, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    print(f"Warm Chrome started (pid {process.pid}), attach with --attach 127.0.0.1:{port}")
+    return process
+
+
+def attach_chromedriver(debugger_address, lean=LEAN_BROWSER):
+    print(f"Attaching to running Chrome at {debugger_address}...")
+    chrome_options = Options()
+    chrome_options.debugger_address = debugger_address
+    if lean:
+        # wait_for_page treats "interactive" as loaded, as for launched drivers
+        chrome_options.page_load_strategy = "eager"
+    driver = start_chrome(chrome_options)
+    attached_sessions.add(driver.session_id)
+    if lean:
+        block_resources(driver)
+    pid = driver.service.process.pid
+    print(f"Attached to Chrome. Driver process ID: {pid}")
+    return driver, pid
+
+
+def block_resources(driver):
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_RESOURCE_PATTERNS})
+    except WebDriverException as e:
+        print(f"Could not block resources through CDP: {e}")
+
+
+@retries(max_retries=2, delay=1, exceptions=(WebDriverException,))
+def get_chromedriver(headless=False, lean=LEAN_BROWSER):
     print("Initializing Chrome WebDriver...")
     current_dir = os.getcwd()  # Get current working directory for downloads
     chrome_options = Options()
-    chrome_options.add_experimental_option("prefs", {
+    prefs = {
         "download.default_directory": current_dir,
         "download.prompt_for_download": False,
         "download.directory_upgrade": True,
         "safebrowsing.enabled": True
-    })
+    }
     chrome_options.add_argument("--disable-logging")
-    chrome_options.add_argument("--start-maximized")
+    if lean:
+        prefs.update({
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.stylesheets": 2,
+            "profile.managed_default_content_settings.fonts": 2,
+            "profile.managed_default_content_settings.plugins": 2,
+            "profile.managed_default_content_settings.popups": 2,
+            "profile.managed_default_content_settings.notifications": 2,
+        })
+        chrome_options.page_load_strategy = "eager"
+        for argument in (
+            "--window-size=1280,900",
+            "--blink-settings=imagesEnabled=false",
+            "--disable-extensions",
+            "--disable-gpu",
+            "--disable-background-networking",
+            "--disable-background-timer-throttling",
+            "--disable-default-apps",
+            "--disable-sync",
+            "--disable-component-update",
+            "--disable-features=Translate,MediaRouter,OptimizationHints",
+            "--no-first-run",
+            "--mute-audio",
+        ):
+            chrome_options.add_argument(argument)
+    else:
+        chrome_options.add_argument("--start-maximized")
+    chrome_options.add_experimental_option("prefs", prefs)
     if headless:
         chrome_options.add_argument("--headless")
 
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    driver = start_chrome(chrome_options)
+    if lean:
+        block_resources(driver)
     pid = driver.service.process.pid
     print(f"Chrome WebDriver initialized. Process ID: {pid}")
     return driver, pid
 
 
+def get_http_session(pool_size=10):
+    print("Initializing HTTP session...")
+    session = requests.Session()
+    # Only connection-level retries here; status retries and backoff go
+    # through the per-host scheduler in fetch_tree.
+    retry = Retry(total=2, connect=2, read=0, status=0, backoff_factor=0)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0 Safari/537.36",
+        "Connection": "keep-alive",
+    })
+    return session
+
+
+def timed_get(driver, url):
+    with SCHEDULER.request(url):
+        started = time.perf_counter()
+        try:
+            driver.get(url)
+        finally:
+            METRICS.observe_url(url, time.perf_counter() - started)
+
+
+def fetch_response(session, url, timeout=30, max_attempts=3):
+    # Throttled per host; 429/5xx and network errors back the host off and retry
+    for attempt in range(1, max_attempts + 1):
+        try:
+            with SCHEDULER.request(url):
+                started = time.perf_counter()
+                try:
+                    response = session.get(url, timeout=timeout)
+                finally:
+                    METRICS.observe_url(url, time.perf_counter() - started)
+                if response.status_code == 429 or response.status_code >= 500:
+                    response.raise_for_status()
+            response.raise_for_status()
+            return response
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            if isinstance(e, requests.Timeout):
+                METRICS.incr("timeouts", "http")
+            status = e.response.status_code if isinstance(e, requests.HTTPError) else None
+            if attempt == max_attempts or (status is not None and status < 500 and status != 429):
+                raise
+            METRICS.incr("retries", "fetch_response")
+            print(f"Fetch of {url} failed on attempt {attempt}/{max_attempts}: {e}")
+
+
+class PageParseError(requests.RequestException):
+    # A 200 response that is empty, truncated or not the expected page. It is
+    # a RequestException so callers fall back to Selenium as for network errors.
+    pass
+
+
+def parse_page(url, body):
+    try:
+        return lxml_html.fromstring(body)
+    except (etree.LxmlError, ValueError) as e:
+        raise PageParseError(f"Unparseable page from {url}: {e}") from e
+
+
+def fetch_tree(session, url, timeout=30, cache=None):
+    # Pages are cached only once they parse
+    body = cache.get_page(url) if cache is not None else None
+    if body is not None:
+        try:
+            return parse_page(url, body)
+        except PageParseError:
+            pass
+    body = fetch_response(session, url, timeout).content
+    tree = parse_page(url, body)
+    if cache is not None:
+        cache.put_page(url, body)
+    return tree
+
+
 def get_case_rows(driver):
     cases_list = []
     try:
-        xpath = "//table[@bgcolor='black']//tr[td/font[normalize-space(text()) = 'FULL ADMINISTRATION WITH WILL' or normalize-space(text()) = 'FULL ADMINISTRATION WITHOUT WILL']]/td[1]/a"
         case_elements = WebDriverWait(driver, 10).until(
-            EC.presence_of_all_elements_located((By.XPATH, xpath))
+            EC.presence_of_all_elements_located((By.XPATH, CASE_ROWS_XPATH))
         )
         for case in case_elements:
             cases_list.append(case.text.strip() if case is not None else None)
         print(f"Found {len(cases_list)} cases.")
     except TimeoutException:
+        METRICS.incr("timeouts", "case_rows")
         print("Timeout: Unable to find case rows within the specified time.")
     except NoSuchElementException:
         print("Error: No elements found matching the criteria.")
@@ -132,19 +400,101 @@ def get_case_rows(driver):
     return cases_list
 
 
-def extract_fields(chrome, fields, data):
+def get_case_rows_http(session, date):
+    tree = fetch_tree(session, INDEX_URL.format(date=date))
+    cases_list = [case.text_content().strip() for case in tree.xpath(CASE_ROWS_XPATH)]
+    print(f"Found {len(cases_list)} cases for {date}.")
+    return cases_list
+
+
+def date_range(start, end):
+    current = datetime.strptime(start, "%Y%m%d")
+    last = datetime.strptime(end, "%Y%m%d")
+    dates = []
+    while current <= last:
+        dates.append(current.strftime("%Y%m%d"))
+        current += timedelta(days=1)
+    return dates
+
+
+def fetch_index_pages(driver, dates, use_http=True, workers=CASE_WORKERS):
+    cases_by_date = {}
+    if use_http:
+        session = get_http_session(pool_size=workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {date: executor.submit(get_case_rows_http, session, date) for date in dates}
+            for date, future in futures.items():
+                try:
+                    cases_by_date[date] = future.result()
+                except Exception as e:
+                    print(f"HTTP fetch of index for {date} failed, falling back to Selenium: {e}")
+        session.close()
+
+    for date in dates:
+        if date not in cases_by_date:
+            timed_get(driver, INDEX_URL.format(date=date))
+            cases_by_date[date] = get_case_rows(driver)
+    return cases_by_date
+
+
+def collect_cases(driver, dates, use_http=True, workers=CASE_WORKERS):
+    # Fetches the index page of every date (concurrently over HTTP) and merges
+    # them into one de-duplicated case list. Returns the cases in first-seen
+    # order and a map of case number -> ";"-joined dates it was listed on.
+    with METRICS.stage("index_fetch"):
+        cases_by_date = fetch_index_pages(driver, dates, use_http, workers)
+
+    source_dates = {}
+    for date in dates:
+        for case in cases_by_date[date]:
+            if not case:
+                continue
+            source_dates.setdefault(case, []).append(date)
+    listed = sum(len(cases_by_date[date]) for date in dates)
+    print(f"{listed} case rows across {len(dates)} dates, {len(source_dates)} unique cases.")
+    return list(source_dates), {case: ";".join(found_on) for case, found_on in source_dates.items()}
+
+
+def wait_for_page(chrome, wait_xpath=None, timeout=5):
+    try:
+        # "interactive" is enough: the DOM is parsed, and with the eager page
+        # load strategy blocked sub-resources never complete the load.
+        WebDriverWait(chrome, timeout).until(
+            lambda d: d.execute_script("return document.readyState") in ("interactive", "complete")
+        )
+        if wait_xpath:
+            WebDriverWait(chrome, timeout).until(
+                EC.presence_of_element_located((By.XPATH, wait_xpath))
+            )
+        return True
+    except TimeoutException:
+        METRICS.incr("timeouts", "page_ready")
+        print("Timeout: page not ready, extracting what has loaded.")
+        return False
+
+
+def extract_fields(chrome, fields, data, wait_xpath=None, timeout=5):
+    # Wait once, snapshot the DOM once and evaluate every field against it,
+    # so a missing field costs an XPath lookup instead of a full timeout.
+    wait_for_page(chrome, wait_xpath, timeout)
+    with METRICS.stage("extraction"):
+        tree = lxml_html.fromstring(chrome.page_source)
+        extract_fields_from_tree(tree, fields, data)
+
+
+def extract_fields_from_tree(tree, fields, data):
     for field in fields:
         try:
-            element = WebDriverWait(chrome, 5).until(
-                EC.presence_of_element_located((By.XPATH, field["xpath"]))
-            )
-            data[field["key"]] = element.text.strip()
-            if field.get("description"):
-                print(f"{field['description']}: {element.text.strip()}")
-        except TimeoutException:
-            data[field["key"]] = ""
-            if field.get("description"):
-                print(f"{field['description']} not found.")
+            xpath = field.get("compiled") or etree.XPath(field["xpath"])
+            elements = xpath(tree)
+            if elements:
+                data[field["key"]] = elements[0].text_content().strip()
+                if field.get("description"):
+                    print(f"{field['description']}: {data[field['key']]}")
+            else:
+                data[field["key"]] = ""
+                if field.get("description"):
+                    print(f"{field['description']} not found.")
         except Exception as e:
             print(f"Error extracting field {field['key']}: {e}")
 
@@ -161,6 +511,19 @@ def parse_name(data, key, prefix=""):
         print(f"Error parsing name {key}: {e}")
 
 
+def attach_fiduciaries(case_data, fiduciaries):
+    # Each fiduciary keeps its own admin_* and attorney_* keys and becomes one
+    # output row. The flat keys on case_data mirror the first fiduciary for
+    # single-row consumers.
+    for fiduciary in fiduciaries:
+        parse_name(fiduciary, "admin_name", prefix="admin")
+        parse_name(fiduciary, "attorney_name", prefix="attorney")
+    case_data["fiduciaries"] = fiduciaries
+    if fiduciaries:
+        case_data.update(fiduciaries[0])
+    return case_data
+
+
 def process_case_data(chrome, case):
     if not case:
         return {}
@@ -172,34 +535,24 @@ def process_case_data(chrome, case):
     try:
 
         # URLs
-        case_url = f'http://probatesearch.franklincountyohio.gov/netdata/PBCaseTypeE.ndm/ESTATE_DETAIL?caseno={case};;'
-        admin_url = f'https://probatesearch.franklincountyohio.gov/netdata/PBFidy.ndm/input?caseno={case};;'
-
-        # Navigate to the case URL
-        try:
-            chrome.get(case_url)
-            case_data['case_url'] = case_url
-            time.sleep(1)
-        except WebDriverException as e:
-            print(f"Error navigating to case URL: {e}")
-            case_data['case_url'] = case_url
-            return case_data
+        case_url = CASE_URL.format(case=case)
+        admin_url = ADMIN_URL.format(case=case)
 
-        # Define XPaths for case details
-        case_fields = [
-            {"xpath": "//tr[th/font[normalize-space(text()) = 'Case Name']]/td/font", "key": "case_name", "description": "Case Name"},
-            {"xpath": "//tr[th/font[normalize-space(text()) = 'Case Subtype']]/td/font", "key": "case_subtype", "description": "Case Subtype"},
-            {"xpath": "//tr[th/font[normalize-space(text()) = 'Decedent Street']]/td/font", "key": "decendent_address", "description": "Decedent Address"},
-            {"xpath": "//tr[th/font[normalize-space(text()) = 'City']]/td/font", "key": "decendent_city", "description": "Decedent City"},
-            {"xpath": "//tr[th/font[normalize-space(text()) = 'State']]/td/font", "key": "decendent_state", "description": "Decedent State"},
-            {"xpath": "//tr[th/font[normalize-space(text()) = 'Zip']]/td/font", "key": "decendent_zip", "description": "Decedent Zip Code"},
-        ]
+        with METRICS.stage("case_detail"):
+            # Navigate to the case URL
+            try:
+                timed_get(chrome, case_url)
+                case_data['case_url'] = case_url
+            except WebDriverException as e:
+                print(f"Error navigating to case URL: {e}")
+                case_data['case_url'] = case_url
+                return case_data
 
-        # Extract case details
-        try:
-            extract_fields(chrome, case_fields, case_data)
-        except Exception as e:
-            print(f"Error extracting case details: {e}")
+            # Extract case details
+            try:
+                extract_fields(chrome, CASE_FIELDS, case_data)
+            except Exception as e:
+                print(f"Error extracting case details: {e}")
 
         # Parse case name into parts
         try:
@@ -207,49 +560,42 @@ def process_case_data(chrome, case):
         except Exception as e:
             print(f"Error parsing case name: {e}")
 
-        # Navigate to admin URL
-        try:
-            print("Navigating to admin site...")
-            chrome.get(admin_url)
-            case_data['view_state_link'] = admin_url
-            admins = WebDriverWait(chrome, 10).until(
-                EC.presence_of_all_elements_located((By.XPATH, '//table[@bgcolor="black"]/tbody/tr[@bgcolor != "#07528B"]'))
-            )
-        except (TimeoutException, WebDriverException) as e:
-            print(f"Error navigating to admin site or fetching admins: {e}")
-            return case_data
-
-        # Process each admin
-        for i, _ in enumerate(admins):
+        with METRICS.stage("fiduciary_loop"):
+            # Navigate to admin URL
             try:
-                fiduciary_url = f'https://probatesearch.franklincountyohio.gov/netdata/PBFidDetail.ndm/FID_DETAIL?caseno={case};;{i}'
-                chrome.get(fiduciary_url)
-                admin_fields = [
-                    {"xpath": "//tr[th/font[normalize-space(text()) = 'Estate Fiduciaries Name']]/td/font", "key": "admin_name", "description": "Admin Name"},
-                    {"xpath": "//tr[th/font[normalize-space(text()) = 'Street']]/td/font", "key": "admin_address", "description": "Admin Address"},
-                    {"xpath": "//tr[th/font[normalize-space(text()) = 'City']]/td/font", "key": "admin_city", "description": "Admin City"},
-                    {"xpath": "//tr[th/font[normalize-space(text()) = 'State']]/td/font", "key": "admin_state", "description": "Admin State"},
-                    {"xpath": "//tr[th/font[normalize-space(text()) = 'Zip']]/td/font", "key": "admin_zip", "description": "Admin Zip Code"},
-                    {"xpath": "//tr[th/font[normalize-space(text()) = 'Phone Number']]/td/font", "key": "admin_phone", "description": "Admin Phone Number"},
-                ]
-                extract_fields(chrome, admin_fields, case_data)
-                parse_name(case_data, "admin_name", prefix="admin")
-            except Exception as e:
-                print(f"Error processing admin data: {e}")
+                print("Navigating to admin site...")
+                timed_get(chrome, admin_url)
+                case_data['view_state_link'] = admin_url
+                admins = WebDriverWait(chrome, 10).until(
+                    EC.presence_of_all_elements_located((By.XPATH, ADMIN_ROWS_XPATH))
+                )
+            except (TimeoutException, WebDriverException) as e:
+                if isinstance(e, TimeoutException):
+                    METRICS.incr("timeouts", "admin_rows")
+                print(f"Error navigating to admin site or fetching admins: {e}")
+                return case_data
 
-            # Attorney details
-            try:
-                attorney_url = f'https://probatesearch.franklincountyohio.gov/netdata/PBAttyDetail.ndm/ATTY_DETAIL?caseno={case};;{i}'
-                chrome.get(attorney_url)
-                attorney_fields = [
-                    {"xpath": "//tr[th/font[normalize-space(text()) = 'Attorney Name']]/td/font", "key": "attorney_name", "description": "Attorney Name"},
-                    {"xpath": "//tr[th/font[normalize-space(text()) = 'Phone Number']]/td/font", "key": "attorney_phone", "description": "Attorney Phone Number"},
-                    {"xpath": "//tr[th/font[normalize-space(text()) = 'E-mail Address']]/td/font", "key": "attorney_email", "description": "Attorney Email"},
-                ]
-                extract_fields(chrome, attorney_fields, case_data)
-                parse_name(case_data, "attorney_name", prefix="attorney")
-            except Exception as e:
-                print(f"Error processing attorney data: {e}")
+            # Process each admin
+            fiduciaries = []
+            for i, _ in enumerate(admins):
+                fiduciary = {}
+                try:
+                    fiduciary_url = FIDUCIARY_URL.format(case=case, index=i)
+                    timed_get(chrome, fiduciary_url)
+                    extract_fields(chrome, ADMIN_FIELDS, fiduciary)
+                except Exception as e:
+                    print(f"Error processing admin data: {e}")
+
+                # Attorney details
+                try:
+                    with METRICS.stage("attorney"):
+                        attorney_url = ATTORNEY_URL.format(case=case, index=i)
+                        timed_get(chrome, attorney_url)
+                        extract_fields(chrome, ATTORNEY_FIELDS, fiduciary)
+                except Exception as e:
+                    print(f"Error processing attorney data: {e}")
+                fiduciaries.append(fiduciary)
+            attach_fiduciaries(case_data, fiduciaries)
 
         return case_data
 
@@ -259,36 +605,229 @@ def process_case_data(chrome, case):
 
 
 
-def process_all_cases(chrome, cases):
-    all_cases_data = []
-    for case in cases:
+def process_case_data_http(session, case, cache=None):
+    # Network errors are raised so the caller can fall back to Selenium.
+    if not case:
+        return {}
+
+    case = case.strip()
+    print(f"Processing case over HTTP: {case}")
+    case_data = {"caseno": case}
+
+    case_url = CASE_URL.format(case=case)
+    admin_url = ADMIN_URL.format(case=case)
+
+    with METRICS.stage("case_detail"):
+        tree = fetch_tree(session, case_url, cache=cache)
+        case_data['case_url'] = case_url
+        with METRICS.stage("extraction"):
+            extract_fields_from_tree(tree, CASE_FIELDS, case_data)
+    if not case_data.get("case_name"):
+        # An error or placeholder page served with a 200
+        if cache is not None:
+            cache.invalidate_case(case)
+        raise PageParseError(f"{case_url} is not a case detail page")
+    parse_name(case_data, "case_name", prefix="decendent")
+
+    with METRICS.stage("fiduciary_loop"):
+        print("Fetching admin site...")
+        tree = fetch_tree(session, admin_url, cache=cache)
+        case_data['view_state_link'] = admin_url
+        admins = tree.xpath(HTTP_ADMIN_ROWS_XPATH)
+        if not admins:
+            print("No admins found.")
+            return case_data
+
+        # Fiduciary and attorney pages are addressed by fiduciary slot, so
+        # the attorney's identity is only known once its page is fetched.
+        slots = [
+            (FIDUCIARY_URL.format(case=case, index=i), ATTORNEY_URL.format(case=case, index=i))
+            for i, _ in enumerate(admins)
+        ]
+        detail_urls = [url for slot in slots for url in slot]
+        fetch_seconds = {}
+
+        def fetch_detail(url):
+            started = time.perf_counter()
+            detail_tree = fetch_tree(session, url, cache=cache)
+            fetch_seconds[url] = time.perf_counter() - started
+            return detail_tree
+
+        with ThreadPoolExecutor(max_workers=min(DETAIL_FETCH_WORKERS, len(detail_urls))) as executor:
+            trees = dict(zip(detail_urls, executor.map(fetch_detail, detail_urls)))
+
+        fiduciaries = []
+        for fiduciary_url, attorney_url in slots:
+            fiduciary = {}
+            with METRICS.stage("extraction"):
+                extract_fields_from_tree(trees[fiduciary_url], ADMIN_FIELDS, fiduciary)
+                started = time.perf_counter()
+                extract_fields_from_tree(trees[attorney_url], ATTORNEY_FIELDS, fiduciary)
+            # One "attorney" observation per slot (its fetch plus extraction),
+            # as on the Selenium path; the fetches overlap, so it is per-page time
+            METRICS.observe(METRICS.stages, "attorney", fetch_seconds[attorney_url] + time.perf_counter() - started)
+            fiduciaries.append(fiduciary)
+        attach_fiduciaries(case_data, fiduciaries)
+        urls = [case_url, admin_url] + detail_urls
+
+    if cache is not None and is_closed_case(case_data):
+        cache.extend_case(case, urls)
+
+    return case_data
+
+
+def get_cached_probate_record(cache, case):
+    if cache is None or not case:
+        return None
+    cached = cache.get_record("probate", case.strip())
+    if cached is not None:
+        print(f"Cache hit for case {case}")
+    return cached
+
+
+def store_probate_record(cache, case_data):
+    # Records without a case name come from a failed page load, don't keep them
+    if cache is not None and case_data.get("case_name"):
+        cache.put_record("probate", case_data["caseno"], case_data, closed=is_closed_case(case_data))
+
+
+def process_case(chrome, case, session=None, cache=None, start_driver=None):
+    # Cache, then HTTP, then Chrome. chrome may be None when start_driver is
+    # given; the browser is then only started if the case needs it.
+    cached = get_cached_probate_record(cache, case)
+    if cached is not None:
+        return cached
+    case_data = None
+    if session is not None:
         try:
-            case_data = process_case_data(chrome, case)
-            print("caseData is : " ,  case_data)
-            all_cases_data.append(case_data)
-        except Exception as e:
-            print(f"Error processing case {case}: {e}")
-    return all_cases_data
+            case_data = process_case_data_http(session, case, cache=cache)
+        except requests.RequestException as e:
+            print(f"HTTP fetch failed for case {case}, falling back to Selenium: {e}")
+    if case_data is None:
+        if chrome is None:
+            chrome = start_driver()
+        case_data = process_case_data(chrome, case)
+        if not driver_is_alive(chrome):
+            raise WebDriverException("Chrome is no longer responding")
+    store_probate_record(cache, case_data)
+    return case_data
 
 
-def save_to_csv(rows, filename):
-    fieldnames = [
-        "case_num", "parcel_number", "decendent_first_name", "decendent_middle_name", "decendent_last_name",
-        "sub_type", "case_link", "d_property_address", "d_property_city", "d_property_state", "d_property_zip",
-        "view_state_link", "admin_first_name", "admin_middle_name", "admin_last_name", "admin_address", "admin_city",
-        "admin_state", "admin_zip", "admin_phone", "att_first_name", "att_middle_name", "att_last_name", "att_phone", "att_email"
-    ]
+def driver_is_alive(driver):
+    # Asks the browser itself: chromedriver outlives a crashed Chrome or tab,
+    # and process_case_data turns those errors into a near-empty record.
     try:
-        with open(filename, "w", newline="") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(rows)
-        print(f"Data saved to {filename}")
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+def quit_driver(driver):
+    try:
+        if driver.session_id in attached_sessions:
+            # Leave the warm browser running for the next invocation
+            attached_sessions.discard(driver.session_id)
+            driver.service.stop()
+        else:
+            driver.quit()
     except Exception as e:
-        print(f"Error saving data to CSV: {e}")
+        print(f"Error closing the driver: {e}")
+
+
+def case_worker(worker_id, work_queue, emit, use_http, headless=True, max_attempts=2, cache=None):
+    # Drivers are started lazily so HTTP-only workers never launch Chrome unless
+    # a case needs the Selenium fallback.
+    session = get_http_session() if use_http else None
+    driver = None
+
+    def start_driver():
+        nonlocal driver
+        driver, _ = get_chromedriver(headless=headless)
+        return driver
+
+    try:
+        while True:
+            try:
+                index, case = work_queue.get_nowait()
+            except queue.Empty:
+                return
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    case_data = process_case(driver, case, session, cache=cache, start_driver=start_driver)
+                    emit(index, case_data)
+                    break
+                except Exception as e:
+                    METRICS.incr("retries", "case_worker")
+                    print(f"[worker {worker_id}] Error processing case {case} on attempt {attempt}/{max_attempts}: {e}")
+                    if driver is not None:
+                        print(f"[worker {worker_id}] Recycling Chrome WebDriver...")
+                        quit_driver(driver)
+                        driver = None
+            else:
+                # Every attempt failed; tell the writer not to wait for it
+                emit(index, None)
+            work_queue.task_done()
+    finally:
+        if driver is not None:
+            quit_driver(driver)
+        if session is not None:
+            session.close()
+
+
+# Every page the auditor search can land on, checked together after submitting
+AUDITOR_OUTCOME_XPATHS = {
+    "no_records": '//large[contains(text(), "Your search did not find any records")]',
+    "results": '//table[@id="searchResults"]/tbody/tr[td]',
+    "datalet": '//td[@class="DataletHeaderTopLeft"]',
+    "error": '//h1[contains(., "Server Error")] | //h2[contains(., "Runtime Error")]',
+}
+
+
+def detect_auditor_outcome(driver):
+    try:
+        for outcome, xpath in AUDITOR_OUTCOME_XPATHS.items():
+            if driver.find_elements(By.XPATH, xpath):
+                return outcome
+    except WebDriverException:
+        # The page is mid-navigation, poll again
+        pass
+    return False
+
+
+# Result rows scoring below this against the decedent address are not clicked
+MIN_RESULT_MATCH = 0.6
+
+
+def pick_best_result_row(page_source, address, min_score=MIN_RESULT_MATCH, city="", zip_code=""):
+    # Scores every result row from one page snapshot; returns the row's index
+    # and score, or (None, best score) when nothing is a plausible match.
+    # Rows tied on the address are told apart by the decedent's city and zip;
+    # rows still tied after that are ambiguous and also return None.
+    rows = lxml_html.fromstring(page_source).xpath(AUDITOR_OUTCOME_XPATHS["results"])
+    locality = [value for value in (" ".join((city or "").upper().split()), (zip_code or "").strip()[:5]) if value]
+    scored = []
+    for index, row in enumerate(rows):
+        cells = [cell.text_content() for cell in row.xpath("./td")]
+        score = max((address_match_score(address, cell) for cell in cells), default=0.0)
+        text = " ".join(" ".join(cells).upper().split())
+        scored.append((score, sum(value in text for value in locality), index))
+    best_score = max((score for score, _, _ in scored), default=0.0)
+    if best_score < min_score:
+        return None, best_score
+    tied = [entry for entry in scored if entry[0] == best_score]
+    best_locality = max(matches for _, matches, _ in tied)
+    tied = [entry for entry in tied if entry[1] == best_locality]
+    if len(tied) > 1:
+        print(f"{len(tied)} result rows match {address} equally well")
+        return None, best_score
+    return tied[0][2], best_score
+
 
 @retries(max_retries=5, delay=1, exceptions=(ElementClickInterceptedException, TimeoutException))
-def search_and_get_case_data(driver, case_data ):
+def search_and_get_case_data(driver, case_data, outcome_timeout=20):
+    # States: search -> submitted -> no_records | results | datalet | error;
+    # results -> datalet after clicking the best matching row, then extraction.
     try:
         # Parse the address
         parsed_address = parse_address(case_data['decendent_address'])
@@ -296,7 +835,6 @@ def search_and_get_case_data(driver, case_data ):
         if parsed_address['street_no'] == '' and parsed_address['street_name'] == '':
             return case_data
         print('parse_address ' , parsed_address)
-        print("Opened the browser")
 
         # Fill out search form
         def fill_input(xpath, value, field_name):
@@ -320,75 +858,49 @@ def search_and_get_case_data(driver, case_data ):
             search_btn.click()
             print("Clicked the Search Button")
         except TimeoutException:
+            METRICS.incr("timeouts", "auditor_search_button")
             print("Search button not found.")
             return
 
-        time.sleep(3)
-
-        # Check for "No Records Found" error
-        try:
-            WebDriverWait(driver, 11).until(
-                EC.presence_of_element_located(
-                    (By.XPATH, '//large[contains(text(), "Your search did not find any records")]')
-                )
-            )
-            print("No records found for the search.")
-            # beds,bathrooms,Tot Fin Area,Yr Built,transfer date,transfer price
-            case_data.update({
-                'beds': 'N/A',
-                'bathrooms': 'N/A',
-                'Tot Fin Area': 'N/A',
-                'Yr Built': 'N/A',
-                'transfer date': 'N/A',
-                'transfer price': 'N/A'
-            })
-            return case_data
-        except TimeoutException:
-            print("Records found. Continuing...")
-
-        
-        try:
-            record_table_btn = WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.XPATH, '(//table[@id="searchResults"]/tbody/tr)[1]'))
-            )
-            record_table_btn.click()
-            print("Clicked the First Row")
-        except TimeoutException:
-            print("Search Results timed out")
-
-
-        # Helper function to extract data with XPath
-        def extract_data(xpath, key, description=None):
+        state = "submitted"
+        while state != "datalet":
             try:
-                element = WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.XPATH, xpath)))
-                if key == 'parcel_id':
-                    case_data[key] = element.text.split(':')[1].strip()
-                else:
-                    case_data[key] = element.text.strip()
-                if description:
-                    print(f"{description}: {element.text.strip()}")
+                state = WebDriverWait(driver, outcome_timeout, poll_frequency=0.2).until(detect_auditor_outcome)
             except TimeoutException:
-                case_data[key] = ""
-                if description:
-                    print(f"{description} not found.")
-
-        extract_data('//td[@class="DataletHeaderTopLeft"]', 'parcel_id', "Parcel ID")
-        # Dwelling data
-        dwelling_data = {
-            '(//table[@id="Dwelling Data"]//td)[10]': 'bedrooms',
-            '(//table[@id="Dwelling Data"]//td)[11]': 'bathrooms',
-            '(//table[@id="Dwelling Data"]//td)[8]': 'Tot Fin Area',
-            '(//table[@id="Dwelling Data"]//td)[7]': 'Year built'
-        }
-        for xpath, key in dwelling_data.items():
-            extract_data(xpath, key, key)
-
-        # Transfer details
-        extract_data('//tr[td[contains(text(), "Transfer Date")]]/td[@class="DataletData"]',
-                     'Transfer Date', "Transfer Date")
-        extract_data('//tr[td[contains(text(), "Transfer Price")]]/td[@class="DataletData"]',
-                     'Transfer Price', "Transfer Price")
-        # beds,bathrooms,Tot Fin Area,Yr Built,transfer date,transfer price
+                METRICS.incr("timeouts", "auditor_outcome")
+                print("No search outcome appeared in time.")
+                return case_data
+            METRICS.incr("auditor_outcomes", state)
+            print(f"Auditor search outcome: {state}")
+
+            if state == "no_records":
+                # beds,bathrooms,Tot Fin Area,Yr Built,transfer date,transfer price
+                case_data.update({
+                    'bedrooms': 'N/A',
+                    'bathrooms': 'N/A',
+                    'Tot Fin Area': 'N/A',
+                    'Year built': 'N/A',
+                    'Transfer Date': 'N/A',
+                    'Transfer Price': 'N/A'
+                })
+                return case_data
+            if state == "error":
+                print("The auditor site returned an error page.")
+                return case_data
+            if state == "results":
+                index, score = pick_best_result_row(driver.page_source, case_data['decendent_address'], city=case_data.get('decendent_city'), zip_code=case_data.get('decendent_zip'))
+                if index is None:
+                    print(f"No single result row matches {case_data['decendent_address']} (best {score:.2f})")
+                    return case_data
+                rows = driver.find_elements(By.XPATH, AUDITOR_OUTCOME_XPATHS["results"])
+                print(f"Clicking best of {len(rows)} result rows (match {score:.2f})")
+                rows[index].click()
+                # extract_fields below waits for the datalet to load
+                state = "datalet"
+
+        extract_fields(driver, AUDITOR_FIELDS, case_data, wait_xpath=AUDITOR_FIELDS[0]["xpath"])
+        if ':' in case_data.get('parcel_id', ''):
+            case_data['parcel_id'] = case_data['parcel_id'].split(':')[1].strip()
 
         return case_data
 
@@ -396,102 +908,341 @@ def search_and_get_case_data(driver, case_data ):
         print(f"An error occurred while searching for the address: {e}")
         return case_data
 
-def preprocess_case_data(all_data, processed_data):
-    for item in all_data:
-        if item is None:
-            continue
-
-        # Map fields to required output columns
-        processed_data.append({
-            "case_num": item.get('caseno', ''),
-            "parcel number": item.get('parcel_id', ''),  # Assuming 'parcel_id' exists or leave blank
-            "decendent_first_name": item.get('decendent_first_name', ''),
-            "decendent_middle_name": item.get('decendent_middle_name', ''),
-            "decendent_last_name": item.get('decendent_last_name', ''),
-            "sub_type": item.get('case_subtype', ''),
-            "case_link": item.get( "case_url", ''),
-            "d_property_address": item.get('decendent_address', ''),
-            "d_property_city": item.get('decendent_city', ''),
-            "d_property_state": item.get('decendent_state', ''),
-            "d_property_zip": item.get('decendent_zip', ''),
-            "view_state_link": item.get('view_state_link', ''),
-            "admin_first_name": item.get('admin_first_name', ''),
-            "admin_middle_name": item.get('admin_middle_name', ''),
-            "admin_last_name": item.get('admin_last_name', ''),
-            "admin_address": item.get('admin_address', ''),
-            "admin_city": item.get('admin_city', ''),
-            "admin_state": item.get('admin_state', ''),
-            "admin_zip": item.get('admin_zip', ''),
-            "admin_phone": item.get('admin_phone', ''),
-            "att_first_name": item.get('attorney_first_name', ''),
-            "att_middle_name": item.get('attorney_middle_name', ''),
-            "att_last_name": item.get('attorney_last_name', ''),
-            "att_phone": item.get('attorney_phone', ''),
-            "att_email": item.get('attorney_email', ''),
-            "beds": item.get('bedrooms', ''),
-            "bathrooms": item.get('bathrooms', ''),
-            "Tot Fin Area": item.get('Tot Fin Area', ''),
-            "Yr Built": item.get('Year built', ''),
-            "transfer date": item.get('Transfer Date', ''),
-            "transfer price": item.get('Transfer Price', '')
-        })
+AUDITOR_SEARCH_URL = "https://property.franklincountyauditor.com/_web/search/commonsearch.aspx?mode=address"
+
+def is_auditor_result(case_data):
+    # A parcel was found, or the search definitively found none (N/A fill)
+    return bool(case_data.get("parcel_id")) or case_data.get("bedrooms") == "N/A"
+
+
+def enrich_case(driver, case_data, cache=None, parcel_index=None, address_memo=None):
+    if parcel_index is not None:
+        parcel = parcel_index.lookup(case_data.get("decendent_address"))
+        if parcel is not None:
+            print(f"Parcel index hit for {case_data.get('decendent_address')}: {parcel['parcel_id']}")
+            case_data.update(parcel)
+            return case_data
+
+    caseno = case_data.get("caseno")
+    if cache is not None and caseno:
+        cached = cache.get_record("auditor", caseno)
+        if cached is not None:
+            print(f"Cache hit for auditor data of case {caseno}")
+            case_data.update(cached)
+            return case_data
+
+    # Another case (this run or an earlier one) at the same address
+    if address_memo is not None:
+        remembered = address_memo.get(case_data.get("decendent_address"), case_data.get("decendent_city"), case_data.get("decendent_zip"))
+        if remembered is not None:
+            print(f"Address memo hit for {case_data.get('decendent_address')}")
+            case_data.update(remembered)
+            if cache is not None and caseno:
+                cache.put_record("auditor", caseno, remembered)
+            return case_data
+
+    before = dict(case_data)
+    with METRICS.stage("auditor_search"):
+        timed_get(driver, AUDITOR_SEARCH_URL)
+        enriched = search_and_get_case_data(driver, case_data)
+    enriched = enriched if enriched is not None else case_data
+
+    # Cache only the fields the auditor stage added, and only a real result:
+    # a datalet that timed out leaves blanks that must not stick for 30 days.
+    auditor_data = {key: value for key, value in enriched.items() if before.get(key) != value}
+    if not is_auditor_result(enriched):
+        print(f"No auditor result for case {caseno}, not caching it")
+        return enriched
+    if cache is not None and caseno and auditor_data:
+        cache.put_record("auditor", caseno, auditor_data)
+    if address_memo is not None:
+        address_memo.put(case_data.get("decendent_address"), auditor_data, case_data.get("decendent_city"), case_data.get("decendent_zip"))
+    return enriched
 
 
+def detail_hash(case_tree, admin_tree):
+    # Hashes the case fields and the fiduciary list, the two pages whose
+    # content decides whether a known case needs a full scrape again.
+    texts = [element.text_content() for field in CASE_FIELDS for element in field["compiled"](case_tree)]
+    texts += [row.text_content() for row in admin_tree.xpath(HTTP_ADMIN_ROWS_XPATH)]
+    return content_hash(texts)
+
+
+def revalidate_case(session, case, state, cache=None):
+    # Returns (status, content hash). Closed estates already in the state
+    # store are trusted without a request; any other known case costs two page
+    # loads. Fresh pages replace the cached copies so a full scrape reuses them.
+    known = state.get(case)
+    if known is not None and is_closed_case(known["record"]):
+        return UNCHANGED, known["content_hash"]
+    try:
+        bodies = {url: fetch_response(session, url).content for url in (CASE_URL.format(case=case), ADMIN_URL.format(case=case))}
+        # parse_page raises PageParseError (a RequestException) on a bad body
+        digest = detail_hash(*(parse_page(url, body) for url, body in bodies.items()))
+    except requests.RequestException as e:
+        print(f"Revalidation of case {case} failed, scraping it in full: {e}")
+        if cache is not None:
+            cache.invalidate_case(case)
+        return (NEW if known is None else CHANGED), None
+    status = NEW if known is None else UNCHANGED if known["content_hash"] == digest else CHANGED
+    if cache is not None:
+        if status != UNCHANGED:
+            cache.invalidate_case(case)
+        for url, body in bodies.items():
+            cache.put_page(url, body)
+    return status, digest
+
+
+def revalidate_cases(cases, state, cache=None, workers=CASE_WORKERS):
+    revalidated = {}
+    session = get_http_session(pool_size=workers)
+    with METRICS.stage("revalidate"):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {case.strip(): executor.submit(revalidate_case, session, case.strip(), state, cache) for case in cases if case}
+            for case, future in futures.items():
+                try:
+                    revalidated[case] = future.result()
+                except Exception as e:
+                    # One bad case must not abort the run; scrape it in full
+                    print(f"Revalidation of case {case} failed, scraping it in full: {e}")
+                    revalidated[case] = (CHANGED, None)
+                METRICS.incr("delta", revalidated[case][0])
+    session.close()
+    counts = {status: sum(1 for found, _ in revalidated.values() if found == status) for status in (NEW, CHANGED, UNCHANGED)}
+    print(f"Delta: {counts[NEW]} new, {counts[CHANGED]} changed, {counts[UNCHANGED]} unchanged cases.")
+    return revalidated
+
+
+def probate_producer(worker_id, work_queue, record_queue, use_http, headless=True, cache=None, journal=None):
+    def emit(index, case_data):
+        if journal is not None and case_data and case_data.get("caseno"):
+            journal.record(PROBATE, case_data["caseno"], case_data)
+        record_queue.put((index, case_data))
+
+    try:
+        case_worker(worker_id, work_queue, emit, use_http, headless, cache=cache)
+    finally:
+        # One sentinel per producer tells the auditor stage this worker is done.
+        record_queue.put(None)
+
+
+def resumed_producer(records, record_queue):
+    # Feeds probate records recovered from the journal straight to the auditor stage
+    try:
+        for index, case_data in records:
+            record_queue.put((index, case_data))
+    finally:
+        record_queue.put(None)
+
+
+def run_pipeline(driver, cases, output_path, use_http, workers=CASE_WORKERS, queue_size=None, headless=True, cache=None, journal=None, source_dates=None, parcel_index=None, address_memo=None, output_format=None, state=None, revalidated=None, start_driver=None):
+    # Probate workers feed a bounded queue that the auditor stage drains on the
+    # main driver, and every enriched record is written as soon as it is done.
+    # The bound keeps probate workers from racing ahead of the auditor stage.
+    # With a journal, each stage skips the cases it already finished.
+    # In delta mode (state + revalidated), unchanged cases are re-emitted from
+    # the state store, and new or changed ones also go to a changes-only file.
+    # A main driver that dies is replaced through start_driver (a fresh
+    # headless Chrome by default); the replacement is quit here, the caller's
+    # driver is left to the caller.
+    if start_driver is None:
+        start_driver = lambda: get_chromedriver(headless=headless)[0]
+    main_driver = driver
+    done_rows = []
+    resumed = []
+    work_queue = queue.Queue()
+    pending = 0
+    reused = 0
+    for index, case in enumerate(cases):
+        caseno = case.strip() if case else case
+        known = state.get(caseno) if revalidated and revalidated.get(caseno, (None,))[0] == UNCHANGED else None
+        if journal is not None and journal.get(AUDITOR, caseno) is not None:
+            done_rows.append((index, journal.get(AUDITOR, caseno)))
+        elif known is not None:
+            case_data = known["record"]
+            if source_dates:
+                case_data["source_date"] = source_dates.get(caseno, "")
+            done_rows.append((index, case_data))
+            reused += 1
+        elif journal is not None and journal.get(PROBATE, caseno) is not None:
+            resumed.append((index, journal.get(PROBATE, caseno)))
+        else:
+            work_queue.put((index, case))
+            pending += 1
+    if journal is not None and journal.resumed:
+        print(f"Resuming: {len(done_rows) - reused} cases complete, {len(resumed)} awaiting auditor data, {pending} to scrape.")
+    if revalidated is not None:
+        print(f"Delta: {reused} unchanged cases reused, {pending + len(resumed)} to scrape.")
+    record_queue = queue.Queue(maxsize=queue_size or max(2, workers * 2))
+
+    threads = [
+        threading.Thread(target=probate_producer, args=(n, work_queue, record_queue, use_http, headless), kwargs={"cache": cache, "journal": journal}, daemon=True)
+        for n in range(min(max(workers, 1), pending))
+    ]
+    if resumed:
+        threads.append(threading.Thread(target=resumed_producer, args=(resumed, record_queue), daemon=True))
+    for thread in threads:
+        thread.start()
+
+    written = 0
+    finished = 0
+    state_entries = []
+    # Records arrive in completion order and are buffered until every earlier
+    # case has been written, so the output keeps the input order.
+    ready = dict(done_rows)
+    next_index = 0
+    changes_output = changes_path(output_path) if revalidated is not None else None
+    with open_writer(output_path, output_format) as writer, \
+            (open_writer(changes_output, output_format) if changes_output else nullcontext()) as changes:
+
+        def write(case_data):
+            caseno = case_data.get("caseno")
+            status, digest = (revalidated or {}).get(caseno, (NEW, None))
+            for record in records_for_case(case_data):
+                writer.write(record)
+                if changes is not None and status != UNCHANGED:
+                    changes.write(record)
+            if state is not None and caseno and case_data.get("case_name"):
+                state_entries.append((caseno, digest, case_data, status != UNCHANGED))
+
+        def flush():
+            # A None entry is a case that failed every attempt and is skipped
+            nonlocal next_index, written
+            while next_index in ready:
+                case_data = ready.pop(next_index)
+                next_index += 1
+                if case_data is None:
+                    continue
+                with METRICS.stage("write"):
+                    write(case_data)
+                written += 1
+                METRICS.progress(written, len(cases))
+                print(f"[{datetime.now()}] Wrote case {case_data.get('caseno')} ({written}/{len(cases)})")
+
+        def enrich(case_data):
+            # A crashed Chrome is recycled and the case retried once on the new
+            # one. Without a driver (replayed benchmarks) there is nothing to recycle.
+            nonlocal driver
+            for attempt in range(2):
+                try:
+                    result = enrich_case(driver, case_data, cache=cache, parcel_index=parcel_index, address_memo=address_memo)
+                    if driver is None or driver_is_alive(driver) or attempt:
+                        return result
+                except WebDriverException:
+                    if attempt or driver_is_alive(driver):
+                        raise
+                print(f"Auditor driver stopped responding on case {case_data.get('caseno')}, restarting it...")
+                quit_driver(driver)
+                driver = start_driver()
+
+        flush()
+        while finished < len(threads):
+            item = record_queue.get()
+            if item is None:
+                finished += 1
+                continue
+            index, case_data = item
+            if case_data is not None:
+                if source_dates:
+                    case_data["source_date"] = source_dates.get(case_data.get("caseno"), "")
+                try:
+                    case_data = enrich(case_data)
+                    # Only a finished auditor stage is journaled, so --resume retries failures
+                    if journal is not None and case_data.get("caseno"):
+                        journal.record(AUDITOR, case_data["caseno"], case_data)
+                except Exception as e:
+                    print(f"Error enriching case {case_data.get('caseno')}: {e}")
+            ready[index] = case_data
+            flush()
+        # Cases a crashed producer never reported would otherwise hold back the rest
+        while ready:
+            next_index = min(ready)
+            flush()
+
+    if driver is not main_driver:
+        quit_driver(driver)
+    for thread in threads:
+        thread.join()
+    # Only a committed run advances the state, so an interrupted delta run is
+    # re-detected as new/changed next time.
+    if state is not None:
+        state.update(state_entries)
+    return written
+
 
 if __name__ == "__main__":
-    date = input("Enter a date in the format YYYYMMDD:\t ")
-    url = f'https://probatesearch.franklincountyohio.gov/netdata/PBODateInx.ndm/input?string={date}'
-    print("Url : \n" , url)
+    parser = argparse.ArgumentParser(description="Franklin County probate & property data scraper")
+    parser.add_argument("dates", nargs="*", help="One or more dates in YYYYMMDD format (prompted for if omitted)")
+    parser.add_argument("--start", help="First date of a range, YYYYMMDD")
+    parser.add_argument("--end", help="Last date of a range, YYYYMMDD (defaults to --start)")
+    parser.add_argument("--output", default="case_data.csv", help="Consolidated output file")
+    parser.add_argument("--format", choices=("csv", "jsonl", "parquet"), help="Output format (defaults to the --output extension)")
+    parser.add_argument("--parcel-index", default=PARCEL_INDEX_PATH, help="Local bulk parcel index (used when the file exists)")
+    parser.add_argument("--report", default="run_report.json", help="Run metrics report; a .prom extension writes Prometheus text format")
+    parser.add_argument("--progress", action="store_true", help="Show a live progress line on stderr")
+    parser.add_argument("--attach", metavar="HOST:PORT", help="Attach to an already-running Chrome started with remote debugging")
+    parser.add_argument("--launch-browser", type=int, metavar="PORT", help="Start a warm Chrome with remote debugging on PORT and exit")
+    parser.add_argument("--cache", default=CACHE_PATH, help="Page and record cache file")
+    parser.add_argument("--refresh", action="store_true", default=FORCE_REFRESH, help="Ignore cached pages and records for this run")
+    parser.add_argument("--resume", action="store_true", help="Reload the run journal and only process the remaining cases")
+    parser.add_argument("--delta", action="store_true", help="Fully scrape only new or changed cases and also write a changes-only output")
+    parser.add_argument("--state", default=DELTA_STATE_PATH, help="Case state store used by --delta")
+    args = parser.parse_args()
+
+    if args.launch_browser:
+        launch_warm_browser(args.launch_browser)
+        raise SystemExit(0)
+
+    dates = list(args.dates)
+    if args.start:
+        dates += date_range(args.start, args.end or args.start)
+    if not dates:
+        dates = [input("Enter a date in the format YYYYMMDD:\t ").strip()]
+    dates = sorted(set(dates))
+    print("Dates : ", ", ".join(dates))
+
+    METRICS.live = args.progress
+    run_name = dates[0] if len(dates) == 1 else f"{dates[0]}-{dates[-1]}"
+    use_http = PROBATE_ENGINE == "http"
+    cache = PageCache(args.cache, force_refresh=args.refresh)
+    journal = RunJournal(f"journal_{run_name}.jsonl", resume=args.resume)
+    parcel_index = ParcelIndex(args.parcel_index) if os.path.exists(args.parcel_index) else None
+    address_memo = AddressMemo(cache)
+    state = CaseStateStore(args.state) if args.delta else None
     try:
         print("Getting the Chrome Driver...")
-        driver, pid = get_chromedriver(headless=True)
-        driver.get(url)
+        if args.attach:
+            driver, pid = attach_chromedriver(args.attach)
+        else:
+            driver, pid = get_chromedriver(headless=True)
         print("Fetching case rows...")
-        cases = get_case_rows(driver)
+        cases, source_dates = collect_cases(driver, dates, use_http=use_http)
         print(f"Total cases found: {len(cases)}")
-        all_data = []
-        unprocessed_data = []
-        if cases:
-            all_data = process_all_cases(driver, cases)
-            # save_to_csv(all_data, "case_data.csv")
-        for data in all_data:
-            driver.get("https://property.franklincountyauditor.com/_web/search/commonsearch.aspx?mode=address")
-            unprocessed_data.append(search_and_get_case_data(driver, data))
-
-            print('data is data' , data)
-        print("Processing complete.")
-
-        processed_case_data = []
-    
-        try:
-            # Process individual case data
-            preprocess_case_data(unprocessed_data, processed_case_data)  # Using the reference `process_case_data` function
-        except Exception as e:
-            print(f"[{datetime.now()}] Error processing case : ")
-    
-        COLUMN_NAMES = [
-            "case_num", "parcel number", "decendent_first_name", "decendent_middle_name", "decendent_last_name",
-            "sub_type", "case_link", "d_property_address", "d_property_city", "d_property_state", "d_property_zip",
-            "view_state_link", "admin_first_name", "admin_middle_name", "admin_last_name", "admin_address", "admin_city",
-            "admin_state", "admin_zip", "admin_phone", "att_first_name", "att_middle_name", "att_last_name", "att_phone",
-            "att_email", "beds", "bathrooms", "Tot Fin Area", "Yr Built", "transfer date", "transfer price"
-        ]
-
-        csv_filename = "case_data.csv"
-        df = pd.DataFrame(processed_case_data , columns=COLUMN_NAMES)
-        if os.path.exists(csv_filename):
-            if os.path.exists('Previous_data.csv'):
-                os.remove('Previous_data.csv')
-            os.rename(csv_filename , 'Previous_data.csv')
-
-        df.to_csv(csv_filename, index=False)
-        print(f"[{datetime.now()}] All data saved to {csv_filename}")
+        revalidated = revalidate_cases(cases, state, cache=cache) if state is not None else None
+        if args.attach:
+            start_driver = lambda: attach_chromedriver(args.attach)[0]
+        else:
+            start_driver = lambda: get_chromedriver(headless=True)[0]
+        written = run_pipeline(driver, cases, args.output, use_http=use_http, workers=CASE_WORKERS, cache=cache, journal=journal, source_dates=source_dates, parcel_index=parcel_index, address_memo=address_memo, output_format=args.format, state=state, revalidated=revalidated, start_driver=start_driver)
+        print(f"Cache hits: {cache.hits}, misses: {cache.misses}")
+        print(f"Address memo hits: {address_memo.hits}, misses: {address_memo.misses}")
+        print(f"Final host limits: {SCHEDULER.snapshot()}")
+        if parcel_index is not None:
+            print(f"Parcel index hits: {parcel_index.hits}, misses: {parcel_index.misses}")
+        print(f"[{datetime.now()}] {written} records saved to {args.output}")
 
         print(f"[{datetime.now()}] Processing complete.")
     except Exception as e:
         print(f"An error occurred in the main process: {e}")
     finally:
         try:
-            driver.quit()
-        except Exception as e:
-            print(f"Error closing the driver: {e}")
+            quit_driver(driver)
+        except NameError:
+            pass
+        METRICS.write_report(args.report, caches={"page_cache": cache, "parcel_index": parcel_index, "address_memo": address_memo})
+        cache.close()
+        journal.close()
+        if state is not None:
+            state.close()
+        if parcel_index is not None:
+            parcel_index.close()
@@ -0,0 +1,213 @@
+import re
+import threading
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+ONES = [
+    "", "One", "Two", "Three", "Four", "Five", "Six", "Seven", "Eight", "Nine", "Ten",
+    "Eleven", "Twelve", "Thirteen", "Fourteen", "Fifteen", "Sixteen", "Seventeen", "Eighteen", "Nineteen",
+]
+TENS = ["", "", "Twenty", "Thirty", "Forty", "Fifty", "Sixty", "Seventy", "Eighty", "Ninety"]
+IRREGULAR_ORDINALS = {
+    "One": "First", "Two": "Second", "Three": "Third", "Five": "Fifth",
+    "Eight": "Eighth", "Nine": "Ninth", "Twelve": "Twelfth",
+}
+
+STREET_SUFFIXES = {
+    "ALLEY": "ALY", "AVENUE": "AVE", "AV": "AVE", "BOULEVARD": "BLVD", "CIRCLE": "CIR", "COURT": "CT",
+    "COVE": "CV", "CROSSING": "XING", "DRIVE": "DR", "EXPRESSWAY": "EXPY", "FREEWAY": "FWY",
+    "HIGHWAY": "HWY", "LANE": "LN", "LOOP": "LOOP", "PARKWAY": "PKWY", "PIKE": "PIKE", "PLACE": "PL",
+    "PLAZA": "PLZ", "POINT": "PT", "ROAD": "RD", "RUN": "RUN", "SQUARE": "SQ", "STREET": "ST",
+    "TERRACE": "TER", "TRACE": "TRCE", "TRAIL": "TRL", "TURNPIKE": "TPKE", "WAY": "WAY",
+}
+DIRECTIONS = {
+    "NORTH": "N", "SOUTH": "S", "EAST": "E", "WEST": "W",
+    "NORTHEAST": "NE", "NORTHWEST": "NW", "SOUTHEAST": "SE", "SOUTHWEST": "SW",
+}
+
+ORDINAL_TOKEN = re.compile(r"^(\d+)(ST|ND|RD|TH)?$", re.IGNORECASE)
+UNIT_DESIGNATOR = re.compile(r"\s*(?:\b(?:APT|APARTMENT|UNIT|STE|SUITE|LOT)\b|#).*$", re.IGNORECASE)
+NON_ALNUM = re.compile(r"[^A-Z0-9 ]+")
+
+
+def cardinal_words(number):
+    if number < 20:
+        return ONES[number]
+    if number < 100:
+        return f"{TENS[number // 10]} {ONES[number % 10]}".strip()
+    rest = cardinal_words(number % 100)
+    return f"{ONES[number // 100]} Hundred {rest}".strip()
+
+
+@lru_cache(maxsize=None)
+def ordinal_words(number):
+    # 21 -> "Twenty First", 100 -> "One Hundredth"
+    words = cardinal_words(number).split(" ")
+    last = words[-1]
+    if last in IRREGULAR_ORDINALS:
+        words[-1] = IRREGULAR_ORDINALS[last]
+    elif last.endswith("y"):
+        words[-1] = last[:-1] + "ieth"
+    else:
+        words[-1] = last + "th"
+    return " ".join(words)
+
+
+def numeric_ordinal(number):
+    if 10 <= number % 100 <= 20:
+        suffix = "TH"
+    else:
+        suffix = {1: "ST", 2: "ND", 3: "RD"}.get(number % 10, "TH")
+    return f"{number}{suffix}"
+
+
+# "TWENTY FIRST" -> "21ST", longest phrases first so they win over "FIRST"
+WORD_ORDINALS = {ordinal_words(n).upper(): numeric_ordinal(n) for n in range(1, 200)}
+WORD_ORDINAL_PATTERN = re.compile(
+    r"\b(" + "|".join(sorted(WORD_ORDINALS, key=len, reverse=True)) + r")\b"
+)
+
+
+def extract_and_convert_ordinal(text):
+    # Converts the first numeric street word to words ("5TH" -> "Fifth"), the
+    # form the auditor's street search expects.
+    for word in text.split():
+        match = ORDINAL_TOKEN.match(word)
+        if match and 0 < int(match.group(1)) < 1000:
+            return ordinal_words(int(match.group(1)))
+    return text
+
+
+def street_words(address):
+    # Street part of an address as upper-case words: unit designators and
+    # punctuation removed, ordinals in numeric form ("FIFTH" -> "5TH").
+    street = (address or "").split(",")[0]
+    street = UNIT_DESIGNATOR.sub("", street).upper()
+    street = NON_ALNUM.sub(" ", street)
+    street = WORD_ORDINAL_PATTERN.sub(lambda match: WORD_ORDINALS[match.group(1)], " ".join(street.split()))
+    words = []
+    for word in street.split():
+        match = ORDINAL_TOKEN.match(word)
+        if match and match.group(2):
+            word = numeric_ordinal(int(match.group(1)))
+        words.append(word)
+    return words
+
+
+def is_direction(word):
+    return word in DIRECTIONS or word in DIRECTIONS.values()
+
+
+def parse_address(address):
+    # Street number and the single street-name word the auditor search takes:
+    # directions and suffixes are skipped ("123 North Fifth Street" -> "123",
+    # "Fifth") unless the direction is the name itself ("10 North St").
+    address_parts = (address or "").split(",")
+    address_parts = address_parts[:1] + [part for part in address_parts[1:] if not UNIT_DESIGNATOR.match(part.strip())]
+    state_info = address_parts[-1].strip().split(" ") if len(address_parts) > 1 else ""
+
+    words = street_words(address)
+    if len(words) < 2:
+        return {
+            'street_no': '',
+            'street_name': '',
+            'city': '',
+            'state': '',
+            'zip': '',
+        }
+    street_no, names = words[0], words[1:]
+    while len(names) > 1 and is_direction(names[0]) and names[1] not in STREET_SUFFIXES and names[1] not in STREET_SUFFIXES.values():
+        names = names[1:]
+    street_name = extract_and_convert_ordinal(names[0])
+
+    # Split the state information
+    city = state_info[0] if len(state_info) > 0 else ''
+    state = state_info[1] if len(state_info) > 1 else ''
+    zip_code = state_info[2] if len(state_info) > 2 else ''  # Assuming zip is at index 2
+
+    return {
+        'street_no': street_no,
+        'street_name': street_name,
+        'city': city,
+        'state': state,
+        'zip': zip_code,
+    }
+
+
+@lru_cache(maxsize=65536)
+def canonical_key(address):
+    # "123 North Fifth Street, Apt 2" -> "123 N 5TH ST". Spelling variants of
+    # the same street address map to the same key.
+    return " ".join(DIRECTIONS.get(word, STREET_SUFFIXES.get(word, word)) for word in street_words(address))
+
+
+def address_match_score(target, candidate):
+    # 1.0 for the same canonical address, lower for near matches; a different
+    # house number halves the score.
+    target_key = canonical_key(target or "")
+    candidate_key = canonical_key(candidate or "")
+    if not target_key or not candidate_key:
+        return 0.0
+    if target_key == candidate_key:
+        return 1.0
+    score = SequenceMatcher(None, target_key, candidate_key).ratio()
+    if target_key.split()[0] != candidate_key.split()[0]:
+        score /= 2
+    return score
+
+
+def memo_key(address, city="", zip_code=""):
+    # Street key qualified by city and 5-digit zip: "123 MAIN ST" exists in
+    # several Franklin County cities, each a different parcel.
+    street = canonical_key(address or "")
+    if not street:
+        return ""
+    return f"{street}|{' '.join((city or '').upper().split())}|{(zip_code or '').strip()[:5]}"
+
+
+class AddressMemo:
+    # Memo of canonical address (with city and zip) -> auditor result. An in-process LRU sits in
+    # front of the persistent page cache so repeated addresses within a run
+    # never touch SQLite, and addresses seen in earlier runs skip the browser.
+
+    def __init__(self, cache=None, max_entries=10000):
+        self.cache = cache
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, address, city="", zip_code=""):
+        key = memo_key(address, city, zip_code)
+        if not key:
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(self._entries[key])
+        result = self.cache.get_record("address", key) if self.cache is not None else None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._remember(key, result)
+        return dict(result)
+
+    def put(self, address, result, city="", zip_code=""):
+        key = memo_key(address, city, zip_code)
+        if not key or not result:
+            return
+        self._remember(key, result)
+        if self.cache is not None:
+            self.cache.put_record("address", key, result)
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._entries[key] = dict(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
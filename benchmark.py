@@ -0,0 +1,192 @@
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import Scraper
+import replay
+from address import canonical_key
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Seconds between RSS samples of the process tree
+RSS_SAMPLE_SECONDS = 0.2
+
+
+class PeakRss:
+    # Peak memory of one benchmark run. Each run gets a fresh process, so the
+    # value is per run. With psutil the RSS of the whole process tree (Chrome
+    # and chromedriver included) is sampled and summed; without it, the
+    # high-water marks of this process and of its largest reaped child are
+    # added, which undercounts Chrome's multi-process tree.
+
+    def __init__(self):
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        root = psutil.Process()
+        while True:
+            total = 0
+            for process in [root] + root.children(recursive=True):
+                try:
+                    total += process.memory_info().rss
+                except psutil.Error:
+                    pass
+            self.peak = max(self.peak, total)
+            if self._stop.wait(RSS_SAMPLE_SECONDS):
+                return
+
+    def __enter__(self):
+        if psutil is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if psutil is not None:
+            self._stop.set()
+            self._thread.join()
+
+    def mb(self):
+        if psutil is not None:
+            return round(self.peak / 1024 / 1024, 1)
+        if resource is None:
+            return None
+        # ru_maxrss is in kilobytes on Linux
+        kilobytes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        return round(kilobytes / 1024, 1)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_pipeline(cases, workers, auditor, engine):
+    # Runs the real pipeline (probate workers, bounded queue, ordered writer)
+    # with the auditor stage replaced by a stub that reads the replayed
+    # datalet. A case's latency runs from its first process_case call to the
+    # moment its enriched record is handed to the writer.
+    started = {}
+    finished = {}
+    lock = threading.Lock()
+    process_case = Scraper.process_case
+    enrich_case = Scraper.enrich_case
+    session = Scraper.get_http_session()
+    driver = Scraper.get_chromedriver(headless=True)[0] if auditor and engine == "selenium" else None
+
+    def timed_process_case(chrome, case, *args, **kwargs):
+        with lock:
+            started.setdefault(case.strip(), time.perf_counter())
+        return process_case(chrome, case, *args, **kwargs)
+
+    def replayed_enrich_case(driver, case_data, **kwargs):
+        key = canonical_key(case_data.get("decendent_address") or "")
+        if auditor and key:
+            url = replay.DATALET_REPLAY_URL.format(key=key)
+            if driver is None:
+                Scraper.extract_fields_from_tree(Scraper.fetch_tree(session, url), Scraper.AUDITOR_FIELDS, case_data)
+            else:
+                driver.get(url)
+                Scraper.extract_fields(driver, Scraper.AUDITOR_FIELDS, case_data)
+        finished[case_data.get("caseno")] = time.perf_counter()
+        return case_data
+
+    Scraper.process_case = timed_process_case
+    Scraper.enrich_case = replayed_enrich_case
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            written = Scraper.run_pipeline(
+                driver, cases, os.path.join(directory, "benchmark.jsonl"), use_http=engine == "http",
+                workers=workers, start_driver=lambda: Scraper.get_chromedriver(headless=True)[0],
+            )
+    finally:
+        Scraper.process_case = process_case
+        Scraper.enrich_case = enrich_case
+        session.close()
+        if driver is not None:
+            Scraper.quit_driver(driver)
+    latencies = [finished[case] - started[case] for case in finished if case in started]
+    return latencies, len(cases) - written
+
+
+def measure_run(engine, base_url, cases, workers, auditor):
+    # Runs one configuration; called in a fresh process per worker count
+    replay.point_scraper_at(base_url)
+    with PeakRss() as rss:
+        started = time.perf_counter()
+        latencies, errors = run_pipeline(cases, workers, auditor, engine)
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed, rss.mb()
+
+
+def benchmark(fixtures, dates, engine="http", workers=(1,), latency=0.0, jitter=0.0, error_rate=0.0, auditor=False):
+    server = replay.serve(fixtures, latency=latency, jitter=jitter, error_rate=error_rate)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    original = replay.point_scraper_at(base_url)
+    results = []
+    try:
+        session = Scraper.get_http_session()
+        cases = []
+        for date in dates:
+            cases += Scraper.get_case_rows_http(session, date)
+        session.close()
+        cases = list(dict.fromkeys(case for case in cases if case))
+
+        spawn = multiprocessing.get_context("spawn")
+        for worker_count in workers:
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+                latencies, errors, elapsed, rss_mb = executor.submit(
+                    measure_run, engine, base_url, cases, worker_count, auditor
+                ).result()
+            results.append({
+                "engine": engine,
+                "workers": worker_count,
+                "cases": len(cases),
+                "errors": errors,
+                "seconds": round(elapsed, 3),
+                "cases_per_sec": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+                "p50_seconds": round(statistics.median(latencies), 4) if latencies else 0.0,
+                "p95_seconds": round(percentile(latencies, 0.95), 4),
+                "peak_rss_mb": rss_mb,
+            })
+            print(json.dumps(results[-1]))
+    finally:
+        replay.restore_scraper_urls(original)
+        server.shutdown()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scraper pipeline against recorded fixtures")
+    parser.add_argument("dates", nargs="+", help="Recorded dates to replay (YYYYMMDD)")
+    parser.add_argument("--fixtures", default="fixtures", help="Fixture directory written by replay.py record")
+    parser.add_argument("--engine", choices=("http", "selenium"), default="http")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="Worker counts to compare, e.g. 1 4 8")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean injected latency per request in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Standard deviation of the injected latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--auditor", action="store_true", help="Include recorded auditor datalets")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = benchmark(args.fixtures, args.dates, args.engine, args.workers, args.latency, args.jitter, args.error_rate, args.auditor)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
@@ -0,0 +1,223 @@
+import json
+import sqlite3
+import threading
+import time
+
+DATE = "date"
+CASE = "case"
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+# A lease not renewed within this many seconds is handed to another worker
+LEASE_SECONDS = 300
+# Attempts (including ones lost to crashed workers) before an item is failed
+MAX_ATTEMPTS = 3
+# Finished results read per query when merging, so memory stays bounded
+RESULTS_BATCH = 500
+
+
+class Broker:
+    # Lease-based work queue shared by the coordinator and every worker.
+    # Items are ("date", "YYYYMMDD") shards or ("case", caseno) entries; a
+    # worker claims one, renews its lease while working and acks it with the
+    # result. Leases that expire are returned to the queue.
+
+    def enqueue(self, kind, keys, source_date=""):
+        raise NotImplementedError
+
+    def claim(self, worker_id, lease_seconds=LEASE_SECONDS):
+        raise NotImplementedError
+
+    def heartbeat(self, item_id, worker_id, lease_seconds=LEASE_SECONDS):
+        raise NotImplementedError
+
+    def ack(self, item_id, worker_id, result=None):
+        raise NotImplementedError
+
+    def fail(self, item_id, worker_id, error):
+        raise NotImplementedError
+
+    def counts(self):
+        raise NotImplementedError
+
+    def results(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SqliteBroker(Broker):
+    # "sqlite://" uses WAL, which needs shared memory and so only works for
+    # worker processes on one host. "sqlite-shared://" keeps the rollback
+    # journal so the file can sit on a network share reached by several
+    # machines; that relies on the share honouring POSIX locks (NFSv4 with
+    # locking enabled, SMB with byte-range locks) and suits a few dozen
+    # workers, not hundreds.
+
+    def __init__(self, path, max_attempts=MAX_ATTEMPTS, shared=False):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=DELETE" if shared else "PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                source_date TEXT NOT NULL DEFAULT '',
+                state TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                UNIQUE (kind, key)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS items_state ON items (state, id)")
+
+    def _transaction(self, statements):
+        # BEGIN IMMEDIATE takes the write lock up front so two workers can
+        # never claim the same item.
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(self._conn)
+                self._conn.execute("COMMIT")
+                return result
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, kind, keys, source_date=""):
+        # A case listed on several dates is queued once and keeps every date
+        def insert(conn):
+            for key in keys:
+                conn.execute(
+                    "INSERT INTO items (kind, key, source_date) VALUES (?, ?, ?) ON CONFLICT(kind, key) DO UPDATE SET "
+                    "source_date = CASE WHEN instr(';' || source_date || ';', ';' || excluded.source_date || ';') > 0 "
+                    "THEN source_date ELSE source_date || ';' || excluded.source_date END",
+                    (kind, key, source_date),
+                )
+        self._transaction(insert)
+
+    def _reclaim_expired(self, conn):
+        conn.execute(
+            "UPDATE items SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, worker = NULL, "
+            "error = IFNULL(error, 'lease expired') WHERE state = 'leased' AND lease_expires < ?",
+            (self.max_attempts, time.time()),
+        )
+
+    def claim(self, worker_id, lease_seconds=LEASE_SECONDS):
+        # Returns (id, kind, key, source_date) or None. Date shards are claimed
+        # first so their cases reach the queue early.
+        def take(conn):
+            self._reclaim_expired(conn)
+            row = conn.execute(
+                "SELECT id, kind, key, source_date FROM items WHERE state = 'pending' "
+                "ORDER BY kind = 'case', id LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE items SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                    (worker_id, time.time() + lease_seconds, row[0]),
+                )
+            return row
+        return self._transaction(take)
+
+    def heartbeat(self, item_id, worker_id, lease_seconds=LEASE_SECONDS):
+        # False once the lease has been lost to another worker
+        return self._transaction(lambda conn: conn.execute(
+            "UPDATE items SET lease_expires = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+            (time.time() + lease_seconds, item_id, worker_id),
+        ).rowcount == 1)
+
+    def ack(self, item_id, worker_id, result=None):
+        return self._transaction(lambda conn: conn.execute(
+            "UPDATE items SET state = 'done', result = ?, error = NULL, lease_expires = NULL "
+            "WHERE id = ? AND worker = ? AND state = 'leased'",
+            (json.dumps(result) if result is not None else None, item_id, worker_id),
+        ).rowcount == 1)
+
+    def fail(self, item_id, worker_id, error):
+        return self._transaction(lambda conn: conn.execute(
+            "UPDATE items SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker = NULL, lease_expires = NULL, error = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+            (self.max_attempts, str(error), item_id, worker_id),
+        ).rowcount == 1)
+
+    def counts(self):
+        def count(conn):
+            self._reclaim_expired(conn)
+            return dict(conn.execute("SELECT state, COUNT(*) FROM items GROUP BY state").fetchall())
+        return self._transaction(count)
+
+    def results(self, batch_size=RESULTS_BATCH):
+        # (record, source_date) for every finished case, in enqueue order.
+        # Read in id-keyed batches, so no read is held open while the caller
+        # writes and only one batch is in memory at a time.
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, result, source_date FROM items WHERE kind = 'case' AND state = 'done' "
+                    "AND result IS NOT NULL AND id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+                ).fetchall()
+            for last_id, result, source_date in rows:
+                yield json.loads(result), source_date
+            if len(rows) < batch_size:
+                return
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+BROKERS = {
+    "sqlite": SqliteBroker,
+    "sqlite-shared": lambda path: SqliteBroker(path, shared=True),
+}
+
+
+def open_broker(location):
+    # "jobs.sqlite", "sqlite://jobs.sqlite" or "sqlite-shared:///mnt/share/jobs.sqlite";
+    # other schemes map to brokers registered in BROKERS.
+    scheme, _, target = location.rpartition("://")
+    return BROKERS[scheme or "sqlite"](target)
+
+
+class Heartbeat:
+    # Renews a lease from a background thread while the item is processed
+
+    def __init__(self, broker, item_id, worker_id, lease_seconds=LEASE_SECONDS):
+        self.broker = broker
+        self.item_id = item_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                if not self.broker.heartbeat(self.item_id, self.worker_id, self.lease_seconds):
+                    self.lost = True
+                    print(f"[{self.worker_id}] Lost the lease on item {self.item_id}")
+                    return
+            except Exception as e:
+                # Transient broker errors are retried on the next beat
+                print(f"[{self.worker_id}] Heartbeat failed: {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self._stop.set()
+        self._thread.join()
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+NEW = "new"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+
+
+def content_hash(texts):
+    # Whitespace-insensitive digest of the text that identifies a case's state
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(" ".join(text.split()).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class CaseStateStore:
+    # SQLite record of every case written by an earlier delta run: the content
+    # hash of its detail pages and the last full record, so unchanged cases can
+    # be re-emitted without scraping them again.
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cases (
+                caseno TEXT PRIMARY KEY,
+                content_hash TEXT,
+                record TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                last_changed REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, caseno):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, record FROM cases WHERE caseno = ?", (caseno,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"content_hash": row[0], "record": json.loads(row[1])}
+
+    def update(self, entries):
+        # entries: iterable of (caseno, content_hash, record, changed). Written
+        # in one transaction once a run has committed its output.
+        now = time.time()
+        with self._lock:
+            for caseno, digest, record, changed in entries:
+                self._conn.execute(
+                    "INSERT INTO cases VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(caseno) DO UPDATE SET "
+                    "content_hash = excluded.content_hash, record = excluded.record, last_seen = excluded.last_seen, "
+                    "last_changed = CASE WHEN ? THEN excluded.last_changed ELSE cases.last_changed END",
+                    (caseno, digest, json.dumps(record), now, now, now, changed),
+                )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,50 @@
+import json
+import os
+import threading
+import time
+
+PROBATE = "probate"
+AUDITOR = "auditor"
+
+
+class RunJournal:
+    # Append-only JSONL log of every finished stage of every case. Each line is
+    # flushed and fsynced before the call returns, so a crash loses at most the
+    # case that was in flight.
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.completed = {PROBATE: {}, AUDITOR: {}}
+        self._lock = threading.Lock()
+        self.resumed = resume and os.path.exists(path)
+        if self.resumed:
+            self._load()
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def _load(self):
+        skipped = 0
+        with open(self.path, encoding="utf-8") as journal_file:
+            for line in journal_file:
+                try:
+                    entry = json.loads(line)
+                    self.completed[entry["stage"]][entry["caseno"]] = entry["data"]
+                except (ValueError, KeyError):
+                    # A torn final line from a crash mid-write
+                    skipped += 1
+        print(f"Loaded journal {self.path}: {len(self.completed[PROBATE])} probate, "
+              f"{len(self.completed[AUDITOR])} auditor records ({skipped} unreadable lines skipped)")
+
+    def record(self, stage, caseno, data):
+        line = json.dumps({"stage": stage, "caseno": caseno, "ts": time.time(), "data": data})
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.completed[stage][caseno] = data
+
+    def get(self, stage, caseno):
+        return self.completed[stage].get(caseno)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
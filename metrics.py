@@ -0,0 +1,122 @@
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# Slowest individual URLs kept for the report
+SLOWEST_URLS = 20
+
+
+class Metrics:
+    # Thread-safe collector of stage wall times, per-URL latencies and event
+    # counters. One module-level instance (METRICS) is shared by the scraper.
+
+    def __init__(self):
+        self.started = time.time()
+        self.stages = {}
+        self.urls = {}
+        self.slowest = []
+        self.counters = {}
+        self.live = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(self.stages, name, time.perf_counter() - started)
+
+    def observe(self, table, name, seconds):
+        with self._lock:
+            entry = table.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            entry["count"] += 1
+            entry["total"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+
+    def observe_url(self, url, seconds):
+        # Latencies are grouped by host and page path; the slowest raw URLs are kept
+        parts = urlsplit(url)
+        self.observe(self.urls, f"{parts.netloc}{parts.path}", seconds)
+        with self._lock:
+            self.slowest.append((seconds, url))
+            self.slowest.sort(reverse=True)
+            del self.slowest[SLOWEST_URLS:]
+
+    def incr(self, name, label="", amount=1):
+        with self._lock:
+            key = (name, label)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def progress(self, done, total):
+        if not self.live:
+            return
+        elapsed = time.time() - self.started
+        rate = done / elapsed if elapsed else 0.0
+        remaining = (total - done) / rate if rate else 0.0
+        sys.stderr.write(f"\r[{done}/{total}] {rate * 60:.1f} cases/min, ~{remaining / 60:.1f} min left ")
+        sys.stderr.flush()
+        if done >= total:
+            sys.stderr.write("\n")
+
+    def report(self, caches=None):
+        # caches: {"name": object with hits/misses attributes}
+        with self._lock:
+            counters = {}
+            for (name, label), value in sorted(self.counters.items()):
+                counters.setdefault(name, {})[label or "total"] = value
+            return {
+                "elapsed_seconds": round(time.time() - self.started, 3),
+                "stages": {name: _summary(entry) for name, entry in sorted(self.stages.items())},
+                "urls": {name: _summary(entry) for name, entry in sorted(self.urls.items())},
+                "slowest_urls": [{"url": url, "seconds": round(seconds, 3)} for seconds, url in self.slowest],
+                "counters": counters,
+                "caches": {
+                    name: {
+                        "hits": cache.hits,
+                        "misses": cache.misses,
+                        "hit_rate": round(cache.hits / (cache.hits + cache.misses), 3) if cache.hits + cache.misses else 0.0,
+                    }
+                    for name, cache in (caches or {}).items() if cache is not None
+                },
+            }
+
+    def to_prometheus(self, caches=None):
+        report = self.report(caches)
+        lines = [f"scraper_elapsed_seconds {report['elapsed_seconds']}"]
+        for metric, table in (("scraper_stage", report["stages"]), ("scraper_url", report["urls"])):
+            label = "stage" if metric == "scraper_stage" else "url"
+            for name, entry in table.items():
+                lines.append(f'{metric}_seconds_total{{{label}="{name}"}} {entry["total"]}')
+                lines.append(f'{metric}_seconds_count{{{label}="{name}"}} {entry["count"]}')
+                lines.append(f'{metric}_seconds_max{{{label}="{name}"}} {entry["max"]}')
+        for name, labels in report["counters"].items():
+            for label, value in labels.items():
+                lines.append(f'scraper_{name}_total{{label="{label}"}} {value}')
+        for name, entry in report["caches"].items():
+            lines.append(f'scraper_cache_hits_total{{cache="{name}"}} {entry["hits"]}')
+            lines.append(f'scraper_cache_misses_total{{cache="{name}"}} {entry["misses"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path, caches=None):
+        with open(path, "w", encoding="utf-8") as report_file:
+            if path.endswith(".prom"):
+                report_file.write(self.to_prometheus(caches))
+            else:
+                json.dump(self.report(caches), report_file, indent=2)
+        print(f"Run report written to {path}")
+
+
+def _summary(entry):
+    return {
+        "count": entry["count"],
+        "total": round(entry["total"], 3),
+        "mean": round(entry["total"] / entry["count"], 3) if entry["count"] else 0.0,
+        "max": round(entry["max"], 3),
+    }
+
+
+METRICS = Metrics()
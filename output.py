@@ -0,0 +1,194 @@
+import csv
+import json
+import os
+
+# (attribute, output column, key in the scraped case_data dict)
+OUTPUT_FIELDS = [
+    ("case_num", "case_num", "caseno"),
+    ("parcel_number", "parcel number", "parcel_id"),
+    ("decendent_first_name", "decendent_first_name", "decendent_first_name"),
+    ("decendent_middle_name", "decendent_middle_name", "decendent_middle_name"),
+    ("decendent_last_name", "decendent_last_name", "decendent_last_name"),
+    ("sub_type", "sub_type", "case_subtype"),
+    ("case_link", "case_link", "case_url"),
+    ("d_property_address", "d_property_address", "decendent_address"),
+    ("d_property_city", "d_property_city", "decendent_city"),
+    ("d_property_state", "d_property_state", "decendent_state"),
+    ("d_property_zip", "d_property_zip", "decendent_zip"),
+    ("view_state_link", "view_state_link", "view_state_link"),
+    ("admin_first_name", "admin_first_name", "admin_first_name"),
+    ("admin_middle_name", "admin_middle_name", "admin_middle_name"),
+    ("admin_last_name", "admin_last_name", "admin_last_name"),
+    ("admin_address", "admin_address", "admin_address"),
+    ("admin_city", "admin_city", "admin_city"),
+    ("admin_state", "admin_state", "admin_state"),
+    ("admin_zip", "admin_zip", "admin_zip"),
+    ("admin_phone", "admin_phone", "admin_phone"),
+    ("att_first_name", "att_first_name", "attorney_first_name"),
+    ("att_middle_name", "att_middle_name", "attorney_middle_name"),
+    ("att_last_name", "att_last_name", "attorney_last_name"),
+    ("att_phone", "att_phone", "attorney_phone"),
+    ("att_email", "att_email", "attorney_email"),
+    ("beds", "beds", "bedrooms"),
+    ("bathrooms", "bathrooms", "bathrooms"),
+    ("tot_fin_area", "Tot Fin Area", "Tot Fin Area"),
+    ("yr_built", "Yr Built", "Year built"),
+    ("transfer_date", "transfer date", "Transfer Date"),
+    ("transfer_price", "transfer price", "Transfer Price"),
+    ("source_date", "source_date", "source_date"),
+]
+
+COLUMN_NAMES = [column for _, column, _ in OUTPUT_FIELDS]
+
+# Records buffered per Parquet row group
+PARQUET_ROW_GROUP = 500
+
+
+class CaseRecord:
+    # One output row: case, fiduciary, attorney and property fields, all strings.
+    __slots__ = tuple(attribute for attribute, _, _ in OUTPUT_FIELDS)
+
+    def __init__(self, **values):
+        for attribute in self.__slots__:
+            value = values.get(attribute)
+            setattr(self, attribute, "" if value is None else str(value))
+
+    @classmethod
+    def from_case_data(cls, case_data):
+        return cls(**{attribute: case_data.get(key) for attribute, _, key in OUTPUT_FIELDS})
+
+    def values(self):
+        return [getattr(self, attribute) for attribute in self.__slots__]
+
+    def to_row(self):
+        return dict(zip(COLUMN_NAMES, self.values()))
+
+
+def records_for_case(case_data):
+    # One record per fiduciary, each repeating the case and property columns.
+    # Cases without a fiduciary list (e.g. older cached records) give one record.
+    fiduciaries = case_data.get("fiduciaries")
+    if not fiduciaries:
+        return [CaseRecord.from_case_data(case_data)]
+    shared = {key: value for key, value in case_data.items() if not key.startswith(("admin_", "attorney_"))}
+    return [CaseRecord.from_case_data({**shared, **fiduciary}) for fiduciary in fiduciaries]
+
+
+class RecordWriter:
+    # Streams records into "<path>.partial" and renames it over <path> only
+    # once the run completes, so a crash never clobbers the previous output and
+    # the partial file can be inspected mid-run.
+
+    def __init__(self, path):
+        self.path = path
+        self.partial_path = f"{path}.partial"
+        self.count = 0
+
+    def write(self, record):
+        raise NotImplementedError
+
+    def close(self, commit=True):
+        self._close_file()
+        if commit:
+            os.replace(self.partial_path, self.path)
+            print(f"Output committed to {self.path} ({self.count} records)")
+        else:
+            print(f"Run incomplete, partial output left in {self.partial_path}")
+
+    def _close_file(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close(commit=exc_type is None)
+
+
+class CsvRecordWriter(RecordWriter):
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(self.partial_path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(COLUMN_NAMES)
+        self._file.flush()
+
+    def write(self, record):
+        self._writer.writerow(record.values())
+        self._file.flush()
+        self.count += 1
+
+    def _close_file(self):
+        self._file.close()
+
+
+class JsonlRecordWriter(RecordWriter):
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(self.partial_path, "w", encoding="utf-8")
+
+    def write(self, record):
+        self._file.write(json.dumps(record.to_row()) + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def _close_file(self):
+        self._file.close()
+
+
+class ParquetRecordWriter(RecordWriter):
+    # Rows are flushed one row group at a time; the file is only readable once
+    # closed because Parquet writes its footer last.
+
+    def __init__(self, path, row_group_size=PARQUET_ROW_GROUP):
+        super().__init__(path)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow") from e
+        self._pa = pa
+        self._schema = pa.schema([(column, pa.string()) for column in COLUMN_NAMES])
+        self._writer = pq.ParquetWriter(self.partial_path, self._schema)
+        self._row_group_size = row_group_size
+        self._buffer = []
+
+    def write(self, record):
+        self._buffer.append(record.values())
+        self.count += 1
+        if len(self._buffer) >= self._row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        columns = list(zip(*self._buffer))
+        table = self._pa.table(
+            [self._pa.array(column, type=self._pa.string()) for column in columns], schema=self._schema
+        )
+        self._writer.write_table(table)
+        self._buffer = []
+
+    def _close_file(self):
+        self._flush()
+        self._writer.close()
+
+
+WRITERS = {"csv": CsvRecordWriter, "jsonl": JsonlRecordWriter, "parquet": ParquetRecordWriter}
+
+
+def format_for_path(path):
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    return {"json": "jsonl", "ndjson": "jsonl", "pq": "parquet"}.get(extension, extension if extension in WRITERS else "csv")
+
+
+def changes_path(path):
+    # "case_data.csv" -> "case_data_changes.csv"
+    root, extension = os.path.splitext(path)
+    return f"{root}_changes{extension}"
+
+
+def open_writer(path, output_format=None):
+    return WRITERS[output_format or format_for_path(path)](path)
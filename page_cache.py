@@ -0,0 +1,195 @@
+import json
+import sqlite3
+import threading
+import time
+
+DAY = 24 * 60 * 60
+
+# Time-to-live in seconds for each cached page type / record kind
+DEFAULT_TTLS = {
+    "case": 7 * DAY,
+    "fiduciary_list": 1 * DAY,
+    "fiduciary": 3 * DAY,
+    "attorney": 7 * DAY,
+    "auditor": 30 * DAY,
+    "address": 30 * DAY,
+    "probate": 1 * DAY,
+    "other": 1 * DAY,
+}
+
+# Closed estates no longer change, so their pages and records are kept much longer
+CLOSED_CASE_TTL = 365 * DAY
+
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+
+# Check the size cap after this many writes rather than on every write
+EVICT_EVERY = 50
+
+# Seconds to wait for a write lock held by another process sharing the file
+BUSY_TIMEOUT = 60
+
+
+def page_type_for_url(url):
+    if "ESTATE_DETAIL" in url:
+        return "case"
+    if "PBFidy.ndm" in url:
+        return "fiduciary_list"
+    if "FID_DETAIL" in url:
+        return "fiduciary"
+    if "ATTY_DETAIL" in url:
+        return "attorney"
+    if "franklincountyauditor" in url:
+        return "auditor"
+    return "other"
+
+
+def is_closed_case(record):
+    return "CLOSED" in (record.get("case_status") or "").upper()
+
+
+class PageCache:
+    # SQLite cache of raw pages (keyed by URL) and parsed records (keyed by
+    # kind + case number). Shared by all worker threads behind one lock.
+
+    def __init__(self, path, ttls=None, max_bytes=DEFAULT_MAX_BYTES, force_refresh=False):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_bytes = max_bytes
+        self.force_refresh = force_refresh
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                page_type TEXT NOT NULL,
+                body BLOB NOT NULL,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS records (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                data TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (kind, key)
+            );
+            CREATE INDEX IF NOT EXISTS pages_fetched_at ON pages (fetched_at);
+            CREATE INDEX IF NOT EXISTS records_fetched_at ON records (fetched_at);
+        """)
+        self._conn.commit()
+
+    def ttl_for(self, page_type, closed=False):
+        return CLOSED_CASE_TTL if closed else self.ttls.get(page_type, self.ttls["other"])
+
+    def get_page(self, url):
+        with self._lock:
+            row = None if self.force_refresh else self._conn.execute(
+                "SELECT body FROM pages WHERE url = ? AND expires_at > ?", (url, time.time())
+            ).fetchone()
+            self._count(row)
+        return row[0] if row else None
+
+    def put_page(self, url, body, closed=False):
+        page_type = page_type_for_url(url)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (url, page_type, body, now, now + self.ttl_for(page_type, closed), len(body)),
+            )
+            self._after_write()
+
+    def get_record(self, kind, key):
+        with self._lock:
+            row = None if self.force_refresh else self._conn.execute(
+                "SELECT data FROM records WHERE kind = ? AND key = ? AND expires_at > ?", (kind, key, time.time())
+            ).fetchone()
+            self._count(row)
+        return json.loads(row[0]) if row else None
+
+    def put_record(self, kind, key, record, closed=False):
+        data = json.dumps(record)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, data, now, now + self.ttl_for(kind, closed), len(data)),
+            )
+            self._after_write()
+
+    def extend_case(self, case, urls):
+        # Once a case is known to be closed, stretch the TTL of its pages too
+        expires_at = time.time() + CLOSED_CASE_TTL
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE pages SET expires_at = ? WHERE url = ?", [(expires_at, url) for url in urls]
+            )
+            self._conn.commit()
+
+    def invalidate_case(self, case):
+        # Drops every page and record of a case whose content has changed
+        with self._lock:
+            self._conn.execute("DELETE FROM pages WHERE instr(url, ?) > 0", (f"caseno={case};;",))
+            self._conn.execute("DELETE FROM records WHERE key = ? AND kind != 'address'", (case,))
+            self._conn.commit()
+
+    def evict(self):
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+            self._conn.close()
+
+    def _count(self, row):
+        # Called with the lock held
+        if row:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def _after_write(self):
+        self._writes += 1
+        if self._writes % EVICT_EVERY == 0:
+            self._evict()
+        self._conn.commit()
+
+    def _evict(self):
+        now = time.time()
+        self._conn.execute("DELETE FROM pages WHERE expires_at <= ?", (now,))
+        self._conn.execute("DELETE FROM records WHERE expires_at <= ?", (now,))
+        total = self._conn.execute(
+            "SELECT (SELECT IFNULL(SUM(size), 0) FROM pages) + (SELECT IFNULL(SUM(size), 0) FROM records)"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop the oldest pages first; records are small and cheaper to keep
+        excess = total - self.max_bytes
+        rows = self._conn.execute("SELECT url, size FROM pages ORDER BY fetched_at").fetchall()
+        stale = []
+        for url, size in rows:
+            if excess <= 0:
+                break
+            stale.append((url,))
+            excess -= size
+        self._conn.executemany("DELETE FROM pages WHERE url = ?", stale)
+        if excess > 0:
+            rows = self._conn.execute("SELECT kind, key, size FROM records ORDER BY fetched_at").fetchall()
+            stale = []
+            for kind, key, size in rows:
+                if excess <= 0:
+                    break
+                stale.append((kind, key))
+                excess -= size
+            self._conn.executemany("DELETE FROM records WHERE kind = ? AND key = ?", stale)
+        print(f"Cache over {self.max_bytes} bytes, evicted oldest entries.")
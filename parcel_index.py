@@ -0,0 +1,168 @@
+import argparse
+import csv
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+from address import canonical_key
+
+# Candidate header names for each field in the auditor's bulk parcel/dwelling
+# extracts. Matching is case-insensitive and ignores spaces and underscores.
+BULK_COLUMNS = {
+    "parcel_id": ("PARCEL ID", "PARCELID", "PARID", "PARCEL NUMBER"),
+    "address": ("SITE ADDRESS", "SITUS ADDRESS", "PROPERTY ADDRESS", "ADDRESS", "LOCATION"),
+    "house_number": ("HOUSE NUMBER", "ADRNO", "STREET NUMBER", "SITUS NUMBER"),
+    "street": ("STREET NAME", "ADRSTR", "STREET", "SITUS STREET"),
+    "bedrooms": ("BEDROOMS", "BEDS", "RMBED"),
+    "bathrooms": ("BATHROOMS", "BATHS", "FULL BATHS", "FIXBATH"),
+    "finished_area": ("TOT FIN AREA", "FINISHED AREA", "SFLA", "LIVING AREA"),
+    "year_built": ("YEAR BUILT", "YRBLT", "YR BUILT"),
+    "transfer_date": ("TRANSFER DATE", "SALE DATE", "SALEDT"),
+    "transfer_price": ("TRANSFER PRICE", "SALE PRICE", "PRICE"),
+}
+
+# Keys written into case_data, matching what the live datalet search produces
+CASE_DATA_KEYS = {
+    "parcel_id": "parcel_id",
+    "bedrooms": "bedrooms",
+    "bathrooms": "bathrooms",
+    "finished_area": "Tot Fin Area",
+    "year_built": "Year built",
+    "transfer_date": "Transfer Date",
+    "transfer_price": "Transfer Price",
+}
+
+BATCH_SIZE = 5000
+
+# Transfer date layouts seen in the auditor extracts
+TRANSFER_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%d-%b-%Y", "%d-%b-%y", "%Y%m%d", "%m/%d/%y")
+
+
+def resolve_columns(header):
+    normalized = {re.sub(r"[\s_]+", " ", name.strip().upper()): name for name in header}
+    columns = {}
+    for field, candidates in BULK_COLUMNS.items():
+        for candidate in candidates:
+            if candidate in normalized:
+                columns[field] = normalized[candidate]
+                break
+    if "parcel_id" not in columns:
+        raise ValueError(f"No parcel ID column found in header: {header}")
+    if "address" not in columns and not ("house_number" in columns and "street" in columns):
+        raise ValueError(f"No site address columns found in header: {header}")
+    return columns
+
+
+def sortable_date(value):
+    # ISO form of a transfer date for ordering, "" when it can't be parsed
+    value = (value or "").strip().split(" ")[0]
+    for date_format in TRANSFER_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return ""
+
+
+def import_bulk_file(csv_path, db_path):
+    # Builds into parcels_new and swaps it in at the end, so a failed import
+    # leaves the previous index in place.
+    started = time.time()
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        DROP TABLE IF EXISTS parcels_new;
+        CREATE TABLE parcels_new (
+            address_key TEXT NOT NULL,
+            parcel_id TEXT NOT NULL,
+            bedrooms TEXT,
+            bathrooms TEXT,
+            finished_area TEXT,
+            year_built TEXT,
+            transfer_date TEXT,
+            transfer_price TEXT,
+            transfer_sort TEXT
+        );
+    """)
+    count = 0
+    with open(csv_path, newline="", encoding="utf-8-sig", errors="replace") as bulk_file:
+        sample = bulk_file.read(65536)
+        bulk_file.seek(0)
+        dialect = csv.Sniffer().sniff(sample, delimiters=",|\t")
+        reader = csv.DictReader(bulk_file, dialect=dialect)
+        columns = resolve_columns(reader.fieldnames)
+        print(f"Importing {csv_path} with columns: {columns}")
+
+        batch = []
+        for row in reader:
+            if "address" in columns:
+                address = row.get(columns["address"])
+            else:
+                address = f"{row.get(columns['house_number'], '')} {row.get(columns['street'], '')}"
+            key = canonical_key(address or "")
+            if not key:
+                continue
+            values = tuple(
+                (row.get(columns[field]) or "").strip() if field in columns else ""
+                for field in ("bedrooms", "bathrooms", "finished_area", "year_built", "transfer_date", "transfer_price")
+            )
+            batch.append((key, row[columns["parcel_id"]].strip()) + values + (sortable_date(values[4]),))
+            if len(batch) >= BATCH_SIZE:
+                conn.executemany("INSERT INTO parcels_new VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                count += len(batch)
+                batch = []
+        conn.executemany("INSERT INTO parcels_new VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+        count += len(batch)
+
+    conn.commit()
+    conn.executescript("""
+        BEGIN;
+        DROP TABLE IF EXISTS parcels;
+        ALTER TABLE parcels_new RENAME TO parcels;
+        CREATE INDEX parcels_address_key ON parcels (address_key);
+        COMMIT;
+    """)
+    conn.close()
+    print(f"Imported {count} parcels into {db_path} in {time.time() - started:.1f}s")
+    return count
+
+
+class ParcelIndex:
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(parcels)")}
+        if "transfer_sort" not in columns:
+            self._conn.close()
+            raise ValueError(f"{db_path} was built by an older version, re-import it with parcel_index.py")
+
+    def lookup(self, address):
+        # Returns auditor fields in case_data form, or None when the address is
+        # unknown or maps to several parcels (condos, split lots) so the caller
+        # falls back to the live search. Sales-history extracts have a row per
+        # transfer; the latest one wins.
+        key = canonical_key(address or "")
+        rows = self._conn.execute(
+            "SELECT parcel_id, bedrooms, bathrooms, finished_area, year_built, transfer_date, transfer_price "
+            "FROM parcels WHERE address_key = ? ORDER BY transfer_sort DESC", (key,)
+        ).fetchall() if key else []
+        if len({row[0] for row in rows}) != 1:
+            self.misses += 1
+            return None
+        self.hits += 1
+        fields = ("parcel_id", "bedrooms", "bathrooms", "finished_area", "year_built", "transfer_date", "transfer_price")
+        return {CASE_DATA_KEYS[field]: value for field, value in zip(fields, rows[0])}
+
+    def close(self):
+        self._conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import an auditor bulk parcel file into a local address index")
+    parser.add_argument("csv_path", help="Bulk parcel/dwelling CSV exported by the county auditor")
+    parser.add_argument("--db", default="parcels.sqlite", help="SQLite index to (re)build")
+    args = parser.parse_args()
+    import_bulk_file(args.csv_path, args.db)
@@ -0,0 +1,133 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# Starting limits per host. Rate is requests per second; both rate and
+# concurrency adapt at runtime between their min and max.
+HOST_LIMITS = {
+    "probatesearch.franklincountyohio.gov": {
+        "rate": 4.0, "burst": 4, "max_rate": 20.0, "concurrency": 2, "max_concurrency": 8, "slow_seconds": 5.0,
+    },
+    "property.franklincountyauditor.com": {
+        "rate": 1.0, "burst": 2, "max_rate": 4.0, "concurrency": 1, "max_concurrency": 2, "slow_seconds": 10.0,
+    },
+}
+
+# Consecutive healthy responses needed before a host is allowed to go faster
+RAMP_AFTER = 10
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class HostLimiter:
+    # Token bucket plus an adaptive in-flight cap for one host. Healthy
+    # responses slowly raise rate and concurrency; an error or a slow response
+    # halves both, and an error also pauses the host for a jittered backoff.
+
+    def __init__(self, host, rate=2.0, burst=4, min_rate=0.2, max_rate=10.0,
+                 concurrency=2, max_concurrency=4, slow_seconds=5.0, backoff_base=1.0):
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.concurrency = concurrency
+        self.max_concurrency = max_concurrency
+        self.slow_seconds = slow_seconds
+        self.backoff_base = backoff_base
+        self.tokens = float(burst)
+        self.in_flight = 0
+        self.healthy_streak = 0
+        self.failure_streak = 0
+        self.resume_at = 0.0
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now < self.resume_at:
+                    self._cond.wait(self.resume_at - now)
+                elif self.in_flight >= self.concurrency:
+                    self._cond.wait()
+                elif self.tokens < 1:
+                    self._cond.wait((1 - self.tokens) / self.rate)
+                else:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return
+
+    def release(self, seconds, ok):
+        with self._cond:
+            self.in_flight -= 1
+            if ok and seconds < self.slow_seconds:
+                self.failure_streak = 0
+                self.healthy_streak += 1
+                if self.healthy_streak >= RAMP_AFTER:
+                    self.healthy_streak = 0
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                    self.rate = min(self.max_rate, self.rate * 1.25)
+            else:
+                self.healthy_streak = 0
+                self.concurrency = max(1, self.concurrency // 2)
+                self.rate = max(self.min_rate, self.rate / 2)
+                if not ok:
+                    self.failure_streak += 1
+                    delay = backoff_delay(self.failure_streak, self.backoff_base)
+                    self.resume_at = max(self.resume_at, time.monotonic() + delay)
+                    print(f"{self.host}: backing off {delay:.1f}s (rate {self.rate:.2f}/s, concurrency {self.concurrency})")
+            self._cond.notify_all()
+
+
+class Scheduler:
+
+    def __init__(self, limits=None):
+        self.limits = HOST_LIMITS if limits is None else limits
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, url):
+        # None for hosts without configured limits (e.g. the local replay
+        # server), which are not throttled at all
+        host = urlsplit(url).netloc
+        if host not in self.limits:
+            return None
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = HostLimiter(host, **self.limits[host])
+            return self._limiters[host]
+
+    @contextmanager
+    def request(self, url):
+        # Waits for a slot on the URL's host; an exception inside the block
+        # counts as a failed request.
+        limiter = self.limiter(url)
+        if limiter is None:
+            yield None
+            return
+        limiter.acquire()
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield limiter
+            ok = True
+        finally:
+            limiter.release(time.perf_counter() - started, ok)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                host: {"rate": round(limiter.rate, 2), "concurrency": limiter.concurrency}
+                for host, limiter in self._limiters.items()
+            }
+
+
+SCHEDULER = Scheduler()
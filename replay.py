@@ -0,0 +1,212 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+import Scraper
+from address import canonical_key
+
+MANIFEST = "manifest.json"
+
+# Auditor results are reached through an interactive form, so recorded
+# datalets are replayed under a synthetic URL keyed by the canonical address.
+DATALET_REPLAY_URL = "https://property.franklincountyauditor.com/_replay/datalet?address={key}"
+
+ORIGINS = (
+    "https://probatesearch.franklincountyohio.gov",
+    "http://probatesearch.franklincountyohio.gov",
+    "https://property.franklincountyauditor.com",
+)
+
+
+def fixture_key(url):
+    # Host-qualified path and query, scheme ignored: "host/path?query"
+    parts = urlsplit(url)
+    key = f"{parts.netloc}{parts.path}"
+    if parts.query:
+        key += f"?{parts.query}"
+    return unquote(key)
+
+
+class FixtureStore:
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, MANIFEST)
+        self.manifest = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as manifest_file:
+                self.manifest = json.load(manifest_file)
+
+    def save(self, url, body):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        key = fixture_key(url)
+        filename = hashlib.sha1(key.encode("utf-8")).hexdigest() + ".html"
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, filename), "wb") as fixture_file:
+            fixture_file.write(body)
+        with self._lock:
+            self.manifest[key] = filename
+
+    def load(self, key):
+        filename = self.manifest.get(unquote(key))
+        if filename is None:
+            return None
+        with open(os.path.join(self.directory, filename), "rb") as fixture_file:
+            return fixture_file.read()
+
+    def flush(self):
+        with self._lock:
+            with open(self.manifest_path, "w", encoding="utf-8") as manifest_file:
+                json.dump(self.manifest, manifest_file, indent=1, sort_keys=True)
+
+
+def record(dates, directory, limit=None, auditor=False):
+    # Captures every page the pipeline touches for the given dates. Needs the
+    # same network access (US VPN) as a normal run.
+    store = FixtureStore(directory)
+    session = Scraper.get_http_session()
+
+    def fetch(url):
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+        store.save(url, response.content)
+        return Scraper.lxml_html.fromstring(response.content)
+
+    cases = []
+    for date in dates:
+        tree = fetch(Scraper.INDEX_URL.format(date=date))
+        cases += [case.text_content().strip() for case in tree.xpath(Scraper.CASE_ROWS_XPATH)]
+    cases = list(dict.fromkeys(case for case in cases if case))[:limit]
+    print(f"Recording {len(cases)} cases into {directory}")
+
+    records = []
+    for case in cases:
+        case_data = {"caseno": case}
+        tree = fetch(Scraper.CASE_URL.format(case=case))
+        Scraper.extract_fields_from_tree(tree, Scraper.CASE_FIELDS, case_data)
+        tree = fetch(Scraper.ADMIN_URL.format(case=case))
+        for i, _ in enumerate(tree.xpath(Scraper.HTTP_ADMIN_ROWS_XPATH)):
+            fetch(Scraper.FIDUCIARY_URL.format(case=case, index=i))
+            fetch(Scraper.ATTORNEY_URL.format(case=case, index=i))
+        records.append(case_data)
+    session.close()
+
+    if auditor:
+        driver, _ = Scraper.get_chromedriver(headless=True)
+        try:
+            driver.get(Scraper.AUDITOR_SEARCH_URL)
+            store.save(Scraper.AUDITOR_SEARCH_URL, driver.page_source)
+            for case_data in records:
+                key = canonical_key(case_data.get("decendent_address") or "")
+                if not key:
+                    continue
+                driver.get(Scraper.AUDITOR_SEARCH_URL)
+                Scraper.search_and_get_case_data(driver, dict(case_data))
+                store.save(DATALET_REPLAY_URL.format(key=key), driver.page_source)
+        finally:
+            Scraper.quit_driver(driver)
+
+    store.flush()
+    print(f"Recorded {len(store.manifest)} pages.")
+    return store
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    # Serves /<host>/<path>?<query> from the fixture store with injected
+    # latency and errors. Configured through class attributes by serve().
+    store = None
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+
+    def do_GET(self):
+        delay = max(0.0, random.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+        if delay:
+            time.sleep(delay)
+        if self.error_rate and random.random() < self.error_rate:
+            self.send_error(503, "Injected error")
+            return
+        body = self.store.load(self.path.lstrip("/"))
+        if body is None:
+            self.send_error(404, "No fixture recorded")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(directory, port=0, latency=0.0, jitter=0.0, error_rate=0.0):
+    # Starts the stand-in server on a background thread and returns it; its
+    # base URL is f"http://127.0.0.1:{server.server_address[1]}".
+    handler = type("ConfiguredReplayHandler", (ReplayHandler,), {
+        "store": FixtureStore(directory),
+        "latency": latency,
+        "jitter": jitter,
+        "error_rate": error_rate,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def point_scraper_at(base_url):
+    # Rewrites the county URLs in Scraper so every request goes to the stand-in
+    # server; returns the original values for restore_scraper_urls().
+    original = {}
+    for name in dir(Scraper):
+        value = getattr(Scraper, name)
+        if name.endswith("_URL") and isinstance(value, str):
+            original[name] = value
+            for origin in ORIGINS:
+                value = value.replace(origin, f"{base_url}/{urlsplit(origin).netloc}")
+            setattr(Scraper, name, value)
+    return original
+
+
+def restore_scraper_urls(original):
+    for name, value in original.items():
+        setattr(Scraper, name, value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record county pages into fixtures, or serve them locally")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Capture pages for one or more dates")
+    record_parser.add_argument("dates", nargs="+", help="Dates in YYYYMMDD format")
+    record_parser.add_argument("--fixtures", default="fixtures", help="Fixture directory")
+    record_parser.add_argument("--limit", type=int, help="Record at most this many cases")
+    record_parser.add_argument("--auditor", action="store_true", help="Also record auditor search and datalet pages (needs Chrome)")
+
+    serve_parser = subparsers.add_parser("serve", help="Serve recorded fixtures on a local port")
+    serve_parser.add_argument("--fixtures", default="fixtures", help="Fixture directory")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--latency", type=float, default=0.0, help="Mean injected latency in seconds")
+    serve_parser.add_argument("--jitter", type=float, default=0.0, help="Standard deviation of the injected latency")
+    serve_parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args.dates, args.fixtures, args.limit, args.auditor)
+    else:
+        server = serve(args.fixtures, args.port, args.latency, args.jitter, args.error_rate)
+        print(f"Serving {args.fixtures} on http://127.0.0.1:{server.server_address[1]} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
@@ -0,0 +1,70 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from broker import CASE, DONE, FAILED, LEASED, PENDING, SqliteBroker, open_broker  # noqa: E402
+
+
+def make_broker(tmp_path, **kwargs):
+    broker = SqliteBroker(str(tmp_path / "jobs.sqlite"), **kwargs)
+    broker.enqueue(CASE, ["2023EST000001"], "20230101")
+    return broker
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(tmp_path):
+    broker = make_broker(tmp_path)
+    item_id = broker.claim("w1", lease_seconds=-1)[0]
+    assert broker.counts() == {PENDING: 1}
+    assert broker.claim("w2")[0] == item_id
+    assert broker.counts() == {LEASED: 1}
+
+
+def test_late_ack_from_a_lost_lease_is_rejected(tmp_path):
+    broker = make_broker(tmp_path)
+    item_id = broker.claim("w1", lease_seconds=-1)[0]
+    broker.claim("w2")
+    assert not broker.heartbeat(item_id, "w1")
+    assert not broker.ack(item_id, "w1", {"caseno": "late"})
+    assert broker.ack(item_id, "w2", {"caseno": "2023EST000001"})
+    assert list(broker.results()) == [({"caseno": "2023EST000001"}, "20230101")]
+    assert broker.counts() == {DONE: 1}
+
+
+def test_item_fails_after_max_attempts(tmp_path):
+    broker = make_broker(tmp_path, max_attempts=3)
+    item_id = broker.claim("w1")[0]
+    assert broker.fail(item_id, "w1", "boom")
+    broker.claim("w2", lease_seconds=-1)  # crashed worker, lease expires
+    assert broker.counts() == {PENDING: 1}
+    item_id = broker.claim("w3")[0]
+    assert broker.fail(item_id, "w3", "boom")
+    assert broker.counts() == {FAILED: 1}
+    assert broker.claim("w4") is None
+
+
+def test_enqueue_merges_source_dates(tmp_path):
+    broker = make_broker(tmp_path)
+    broker.enqueue(CASE, ["2023EST000001"], "20230102")
+    broker.enqueue(CASE, ["2023EST000001"], "20230102")
+    assert broker.claim("w1")[3] == "20230101;20230102"
+
+
+def test_open_broker_schemes(tmp_path):
+    path = tmp_path / "jobs.sqlite"
+    for location in (str(path), f"sqlite://{path}", f"sqlite-shared://{path}"):
+        broker = open_broker(location)
+        assert broker.counts() == {}
+        broker.close()
+
+
+def test_results_are_read_in_batches_in_enqueue_order(tmp_path):
+    broker = SqliteBroker(str(tmp_path / "jobs.sqlite"))
+    cases = [f"2023EST{n:06d}" for n in range(5)]
+    broker.enqueue(CASE, cases, "20230101")
+    while True:
+        item = broker.claim("w1")
+        if item is None:
+            break
+        broker.ack(item[0], "w1", {"caseno": item[2]})
+    assert [record["caseno"] for record, _ in broker.results(batch_size=2)] == cases
@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import socket
+import time
+
+import Scraper
+from address import AddressMemo
+from broker import CASE, DATE, FAILED, LEASE_SECONDS, LEASED, PENDING, Heartbeat, open_broker
+from output import open_writer, records_for_case
+from page_cache import PageCache
+from parcel_index import ParcelIndex
+
+# How long an idle worker waits before polling again while others hold leases
+POLL_SECONDS = 10
+
+
+def coordinate(broker, dates, shard=DATE):
+    # Date shards let workers fetch the index pages themselves; case shards
+    # fetch every index here first and queue the de-duplicated cases.
+    if shard == DATE:
+        broker.enqueue(DATE, dates)
+        print(f"Queued {len(dates)} date shards.")
+        return len(dates)
+    session = Scraper.get_http_session()
+    try:
+        for date in dates:
+            broker.enqueue(CASE, [case for case in dict.fromkeys(Scraper.get_case_rows_http(session, date)) if case], date)
+    finally:
+        session.close()
+    queued = broker.counts().get(PENDING, 0)
+    print(f"{queued} cases pending after queuing {len(dates)} dates.")
+    return queued
+
+
+def work(broker, worker_id=None, lease_seconds=LEASE_SECONDS, headless=True, parcel_index_path=Scraper.PARCEL_INDEX_PATH, cache_path=Scraper.CACHE_PATH):
+    # Claims items until the queue is drained. Each worker process owns one
+    # Chrome (started on first use) and one HTTP session; worker processes on
+    # the same host share the page cache file unless given their own.
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    session = Scraper.get_http_session()
+    cache = PageCache(cache_path, force_refresh=Scraper.FORCE_REFRESH)
+    address_memo = AddressMemo(cache)
+    parcel_index = ParcelIndex(parcel_index_path) if os.path.exists(parcel_index_path) else None
+    driver = None
+    processed = 0
+    try:
+        while True:
+            item = broker.claim(worker_id, lease_seconds)
+            if item is None:
+                counts = broker.counts()
+                if not counts.get(PENDING) and not counts.get(LEASED):
+                    break
+                # Others still hold leases; they may fan out or expire
+                time.sleep(POLL_SECONDS)
+                continue
+            item_id, kind, key, source_date = item
+            print(f"[{worker_id}] Claimed {kind} {key}")
+            try:
+                with Heartbeat(broker, item_id, worker_id, lease_seconds) as heartbeat:
+                    if kind == DATE:
+                        cases = Scraper.get_case_rows_http(session, key)
+                        broker.enqueue(CASE, [case for case in dict.fromkeys(cases) if case], key)
+                        result = None
+                    else:
+                        if driver is None:
+                            driver, _ = Scraper.get_chromedriver(headless=headless)
+                        result = Scraper.process_case(driver, key, session, cache=cache)
+                        result["source_date"] = source_date
+                        result = Scraper.enrich_case(driver, result, cache=cache, parcel_index=parcel_index, address_memo=address_memo)
+                if heartbeat.lost or not broker.ack(item_id, worker_id, result):
+                    print(f"[{worker_id}] Result for {kind} {key} discarded, the lease expired")
+                    continue
+                processed += 1
+            except Exception as e:
+                print(f"[{worker_id}] Error processing {kind} {key}: {e}")
+                broker.fail(item_id, worker_id, e)
+                if driver is not None and not Scraper.driver_is_alive(driver):
+                    Scraper.quit_driver(driver)
+                    driver = None
+    finally:
+        if driver is not None:
+            Scraper.quit_driver(driver)
+        session.close()
+        cache.close()
+        if parcel_index is not None:
+            parcel_index.close()
+    print(f"[{worker_id}] Queue drained, {processed} items processed.")
+    return processed
+
+
+def merge(broker, output_path, output_format=None):
+    written = 0
+    with open_writer(output_path, output_format) as writer:
+        for case_data, source_date in broker.results():
+            case_data["source_date"] = source_date
+            for record in records_for_case(case_data):
+                writer.write(record)
+            written += 1
+    counts = broker.counts()
+    print(f"Merged {written} cases into {output_path}; {counts.get(FAILED, 0)} failed, "
+          f"{counts.get(PENDING, 0) + counts.get(LEASED, 0)} still queued.")
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split a scrape across worker processes through a shared lease-based queue")
+    parser.add_argument("--queue", default="jobs.sqlite", help="Queue location: jobs.sqlite (one host) or sqlite-shared:///mnt/share/jobs.sqlite (several hosts)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Queue dates (or their cases) for the workers")
+    enqueue_parser.add_argument("dates", nargs="*", help="Dates in YYYYMMDD format")
+    enqueue_parser.add_argument("--start", help="First date of a range, YYYYMMDD")
+    enqueue_parser.add_argument("--end", help="Last date of a range, YYYYMMDD (defaults to --start)")
+    enqueue_parser.add_argument("--shard", choices=(DATE, CASE), default=DATE, help="Queue whole dates or individual cases")
+
+    work_parser = subparsers.add_parser("work", help="Claim and process items until the queue is drained")
+    work_parser.add_argument("--worker-id", help="Defaults to <hostname>-<pid>")
+    work_parser.add_argument("--lease", type=int, default=LEASE_SECONDS, help="Lease length in seconds")
+    work_parser.add_argument("--cache", default=Scraper.CACHE_PATH, help="Page and record cache file")
+    work_parser.add_argument("--parcel-index", default=Scraper.PARCEL_INDEX_PATH, help="Local bulk parcel index (used when the file exists)")
+
+    merge_parser = subparsers.add_parser("merge", help="Write every finished case into one output file")
+    merge_parser.add_argument("--output", default="case_data.csv")
+    merge_parser.add_argument("--format", choices=("csv", "jsonl", "parquet"), help="Output format (defaults to the --output extension)")
+
+    subparsers.add_parser("status", help="Show item counts per state")
+
+    args = parser.parse_args()
+    broker = open_broker(args.queue)
+    try:
+        if args.command == "enqueue":
+            dates = list(args.dates)
+            if args.start:
+                dates += Scraper.date_range(args.start, args.end or args.start)
+            coordinate(broker, sorted(set(dates)), args.shard)
+        elif args.command == "work":
+            work(broker, args.worker_id, args.lease, parcel_index_path=args.parcel_index, cache_path=args.cache)
+        elif args.command == "merge":
+            merge(broker, args.output, args.format)
+        else:
+            print(json.dumps(broker.counts(), indent=2))
+    finally:
+        broker.close()